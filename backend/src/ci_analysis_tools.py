@@ -1,46 +1,102 @@
-import json
+import logging
 import os
 import boto3
-from typing import Dict, Any, List
+import orjson
+from botocore.config import Config
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime, timedelta
 import sys
+from functools import cached_property
+from itertools import islice
 
 # Add services to path
 sys.path.append('/opt/python')
 from services.opensearch_service import OpenSearchService
 from services.s3_service import S3Service
+from services.ttl_cache import TTLCache
+
+logger = logging.getLogger()
+logger.setLevel(os.environ.get('LOG_LEVEL', 'INFO'))
+
+_BEDROCK_CONFIG = Config(
+    tcp_keepalive=True,
+    max_pool_connections=50,
+    retries={'max_attempts': 2, 'mode': 'adaptive'}
+)
+
+_TOOLS = None
+
+# Brand metadata changes rarely; keep lookups warm for the container lifetime
+_BRAND_CACHE = TTLCache(maxsize=256, ttl=300)
+
+# Whether each index maps the copy_to combined_text field; indices auto-created by ingestion do not
+_COMBINED_TEXT_CACHE = TTLCache(maxsize=16, ttl=300)
+
+# Static query fragments shared by every request; treat as read-only
+_TRIALS_MATCH_FIELDS = ['title', 'sponsor', 'brand']
+_TRIALS_SOURCE = ['phase', 'startDate', 'sponsor', 'title', 'brand']
+_TRIALS_SORT = [{'startDate': {'order': 'desc'}}]
+_TRIALS_AGGS = {
+    'phases': {'terms': {'field': 'phase.keyword', 'size': 20}},
+    'timeline': {'date_histogram': {'field': 'startDate', 'calendar_interval': 'month', 'min_doc_count': 1}}
+}
+
+_REGULATORY_SOURCE = ['type', 'createdAt', 'brand']
+_REGULATORY_SORT = [{'createdAt': {'order': 'desc'}}]
+_REGULATORY_AGGS = {
+    'types': {'terms': {'field': 'type.keyword'}},
+    'brands': {'terms': {'field': 'brand.keyword', 'size': 20}}
+}
+
+_PATENTS_MATCH_FIELDS = ['title', 'assignee', 'claims']
+_PATENTS_SORT = [{'filingDate': {'order': 'desc'}}]
 
 class CIAnalysisTools:
     def __init__(self):
         self.opensearch = OpenSearchService()
-        self.s3 = S3Service()
-        self.bedrock = boto3.client('bedrock-runtime')
+        
+        self._now_iso = None
+        
+        self._routes = {
+            'analyze_brand_competition': self.analyze_brand_competition,
+            'assess_clinical_trials': self.assess_clinical_trials,
+            'regulatory_impact_analysis': self.regulatory_impact_analysis,
+            'patent_landscape_analysis': self.patent_landscape_analysis
+        }
+    
+    @cached_property
+    def s3(self) -> S3Service:
+        """S3 service, created on first use"""
+        return S3Service()
+    
+    @cached_property
+    def bedrock(self):
+        """Bedrock runtime client, created on first use"""
+        return boto3.client('bedrock-runtime', config=_BEDROCK_CONFIG)
     
     def lambda_handler(self, event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         """Handle Bedrock Agent action requests"""
         try:
+            # Stamp the invocation once; handlers reuse it for every timestamp
+            self._now_iso = datetime.now().isoformat()
+            
             # Extract action details from Bedrock Agent event
             action_group = event.get('actionGroup', '')
             function_name = event.get('function', '')
             parameters = event.get('parameters', {})
             
-            print(f"Action: {action_group}.{function_name}")
-            print(f"Parameters: {parameters}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Action: %s.%s", action_group, function_name)
+                logger.debug("Parameters: %s", parameters)
             
             # Route to appropriate analysis function
-            if function_name == 'analyze_brand_competition':
-                return self.analyze_brand_competition(parameters)
-            elif function_name == 'assess_clinical_trials':
-                return self.assess_clinical_trials(parameters)
-            elif function_name == 'regulatory_impact_analysis':
-                return self.regulatory_impact_analysis(parameters)
-            elif function_name == 'patent_landscape_analysis':
-                return self.patent_landscape_analysis(parameters)
-            else:
-                return self._error_response(f"Unknown function: {function_name}")
+            handler = self._routes.get(function_name)
+            if handler:
+                return handler(parameters)
+            return self._error_response(f"Unknown function: {function_name}")
                 
         except Exception as e:
-            print(f"CI Analysis error: {str(e)}")
+            logger.error("CI Analysis error: %s", e)
             return self._error_response(str(e))
     
     def analyze_brand_competition(self, params: Dict[str, Any]) -> Dict[str, Any]:
@@ -52,22 +108,22 @@ class CIAnalysisTools:
             if not brand_name:
                 return self._error_response("Brand name is required")
             
-            # Get brand details
-            brand_data = self._get_brand_data(brand_name)
+            # Get brand details and competitive landscape in one round trip
+            brand_data, competitors = self._get_brand_and_competitors(brand_name, indication)
             if not brand_data:
                 return self._error_response(f"Brand '{brand_name}' not found")
             
-            # Get competitive landscape
-            competitors = self._get_competitors(brand_name, indication)
+            # Extract competitor risk scores once for threat and strength scoring
+            risk_scores = [c.get('riskScore', 50) for c in competitors]
             
             # Analyze market positioning
             market_analysis = self._analyze_market_position(brand_name, competitors)
             
             # Generate competitive threats assessment
-            threats = self._assess_competitive_threats(brand_name, competitors)
+            threats = self._assess_competitive_threats(brand_name, competitors, risk_scores)
             
             # Calculate competitive strength score
-            strength_score = self._calculate_competitive_strength(brand_data, competitors)
+            strength_score = self._calculate_competitive_strength(brand_data, risk_scores)
             
             analysis_result = {
                 'brand': brand_name,
@@ -77,20 +133,10 @@ class CIAnalysisTools:
                 'key_competitors': competitors[:5],  # Top 5 competitors
                 'competitive_threats': threats,
                 'recommendations': self._generate_competitive_recommendations(brand_name, threats),
-                'analysis_timestamp': datetime.now().isoformat()
+                'analysis_timestamp': self._now_iso or datetime.now().isoformat()
             }
             
-            return {
-                'actionGroup': 'competitive-analysis',
-                'function': 'analyze_brand_competition',
-                'functionResponse': {
-                    'responseBody': {
-                        'TEXT': {
-                            'body': json.dumps(analysis_result, indent=2)
-                        }
-                    }
-                }
-            }
+            return self._ok_response('analyze_brand_competition', analysis_result)
             
         except Exception as e:
             return self._error_response(f"Competition analysis failed: {str(e)}")
@@ -106,15 +152,14 @@ class CIAnalysisTools:
                 'query': {
                     'bool': {
                         'must': [
-                            {'multi_match': {
-                                'query': brand_name,
-                                'fields': ['title', 'sponsor', 'brand']
-                            }}
+                            self._text_match('trials', brand_name, _TRIALS_MATCH_FIELDS)
                         ]
                     }
                 },
+                '_source': _TRIALS_SOURCE,
                 'size': 50,
-                'sort': [{'startDate': {'order': 'desc'}}]
+                'sort': _TRIALS_SORT,
+                'aggs': _TRIALS_AGGS
             }
             
             if phase:
@@ -127,25 +172,15 @@ class CIAnalysisTools:
             
             # Analyze trial landscape
             trial_analysis = {
-                'total_trials': len(trials),
-                'phase_distribution': self._analyze_trial_phases(trials),
+                'total_trials': trials_data.get('hits', {}).get('total', {}).get('value', len(trials)),
+                'phase_distribution': self._bucket_counts(trials_data, 'phases'),
                 'competitive_trials': self._identify_competitive_trials(trials, brand_name),
                 'threat_assessment': self._assess_trial_threats(trials, brand_name),
-                'timeline_analysis': self._analyze_trial_timeline(trials),
+                'timeline_analysis': self._bucket_counts(trials_data, 'timeline'),
                 'recommendations': self._generate_trial_recommendations(trials, brand_name)
             }
             
-            return {
-                'actionGroup': 'competitive-analysis',
-                'function': 'assess_clinical_trials',
-                'functionResponse': {
-                    'responseBody': {
-                        'TEXT': {
-                            'body': json.dumps(trial_analysis, indent=2)
-                        }
-                    }
-                }
-            }
+            return self._ok_response('assess_clinical_trials', trial_analysis)
             
         except Exception as e:
             return self._error_response(f"Clinical trials assessment failed: {str(e)}")
@@ -169,8 +204,10 @@ class CIAnalysisTools:
                         ]
                     }
                 },
+                '_source': _REGULATORY_SOURCE,
                 'size': 100,
-                'sort': [{'createdAt': {'order': 'desc'}}]
+                'sort': _REGULATORY_SORT,
+                'aggs': _REGULATORY_AGGS
             }
             
             if event_type:
@@ -183,25 +220,15 @@ class CIAnalysisTools:
             
             # Analyze regulatory impact
             impact_analysis = {
-                'total_events': len(events),
-                'event_types': self._categorize_regulatory_events(events),
-                'brand_impact_summary': self._analyze_brand_impacts(events),
+                'total_events': regulatory_data.get('hits', {}).get('total', {}).get('value', len(events)),
+                'event_types': self._bucket_counts(regulatory_data, 'types'),
+                'brand_impact_summary': self._bucket_counts(regulatory_data, 'brands'),
                 'market_implications': self._assess_market_implications(events),
                 'urgency_assessment': self._assess_regulatory_urgency(events),
                 'strategic_recommendations': self._generate_regulatory_recommendations(events)
             }
             
-            return {
-                'actionGroup': 'competitive-analysis',
-                'function': 'regulatory_impact_analysis',
-                'functionResponse': {
-                    'responseBody': {
-                        'TEXT': {
-                            'body': json.dumps(impact_analysis, indent=2)
-                        }
-                    }
-                }
-            }
+            return self._ok_response('regulatory_impact_analysis', impact_analysis)
             
         except Exception as e:
             return self._error_response(f"Regulatory analysis failed: {str(e)}")
@@ -214,14 +241,9 @@ class CIAnalysisTools:
             
             # Query patent data
             query = {
-                'query': {
-                    'multi_match': {
-                        'query': brand_name,
-                        'fields': ['title', 'assignee', 'claims']
-                    }
-                },
+                'query': self._text_match('patents', brand_name, _PATENTS_MATCH_FIELDS),
                 'size': 50,
-                'sort': [{'filingDate': {'order': 'desc'}}]
+                'sort': _PATENTS_SORT
             }
             
             patent_data = self.opensearch.search('patents', query)
@@ -237,38 +259,60 @@ class CIAnalysisTools:
                 'strategic_recommendations': self._generate_patent_recommendations(patents, brand_name)
             }
             
-            return {
-                'actionGroup': 'competitive-analysis',
-                'function': 'patent_landscape_analysis',
-                'functionResponse': {
-                    'responseBody': {
-                        'TEXT': {
-                            'body': json.dumps(patent_analysis, indent=2)
-                        }
-                    }
-                }
-            }
+            return self._ok_response('patent_landscape_analysis', patent_analysis)
             
         except Exception as e:
             return self._error_response(f"Patent analysis failed: {str(e)}")
     
-    def _get_brand_data(self, brand_name: str) -> Dict[str, Any]:
-        """Get brand data from OpenSearch"""
-        query = {
+    def _get_brand_and_competitors(self, brand_name: str, indication: str = '') -> Tuple[Optional[Dict[str, Any]], List[Dict[str, Any]]]:
+        """Get brand data and competitor brands with a single msearch"""
+        cache_key = (brand_name, indication)
+        cached = _BRAND_CACHE.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        brand_result, competitors_result = self.opensearch.msearch([
+            ('brands', self._brand_query(brand_name)),
+            ('brands', self._competitors_query(brand_name, indication))
+        ])
+        
+        brand_hits = brand_result.get('hits', {}).get('hits', [])
+        competitor_hits = competitors_result.get('hits', {}).get('hits', [])
+        
+        brand_data = brand_hits[0]['_source'] if brand_hits else None
+        result = (brand_data, [hit['_source'] for hit in competitor_hits])
+        
+        # Only cache hits so a transient OpenSearch failure is not remembered
+        if brand_data:
+            _BRAND_CACHE.set(cache_key, result)
+        
+        return result
+    
+    def _text_match(self, index: str, text: str, fields: List[str]) -> Dict[str, Any]:
+        """Match on combined_text where the index maps it, else the multi_match over `fields` it replaces"""
+        has_combined_text = _COMBINED_TEXT_CACHE.get(index)
+        if has_combined_text is None:
+            has_combined_text = self.opensearch.has_field(index, 'combined_text')
+            # Only cache a mapping that was read so a transient OpenSearch failure is not remembered
+            if has_combined_text is not None:
+                _COMBINED_TEXT_CACHE.set(index, has_combined_text)
+        
+        if has_combined_text:
+            return {'match': {'combined_text': text}}
+        return {'multi_match': {'query': text, 'fields': fields}}
+    
+    def _brand_query(self, brand_name: str) -> Dict[str, Any]:
+        """Build the brand lookup query"""
+        return {
             'query': {
                 'match': {
                     'name.keyword': brand_name
                 }
             }
         }
-        
-        result = self.opensearch.search('brands', query)
-        hits = result.get('hits', {}).get('hits', [])
-        
-        return hits[0]['_source'] if hits else None
     
-    def _get_competitors(self, brand_name: str, indication: str = '') -> List[Dict[str, Any]]:
-        """Get competitor brands"""
+    def _competitors_query(self, brand_name: str, indication: str = '') -> Dict[str, Any]:
+        """Build the competitor brands query"""
         query = {
             'query': {
                 'bool': {
@@ -285,10 +329,7 @@ class CIAnalysisTools:
                 {'match': {'indications': indication}}
             ]
         
-        result = self.opensearch.search('brands', query)
-        hits = result.get('hits', {}).get('hits', [])
-        
-        return [hit['_source'] for hit in hits]
+        return query
     
     def _analyze_market_position(self, brand_name: str, competitors: List[Dict]) -> Dict[str, Any]:
         """Analyze market position relative to competitors"""
@@ -300,29 +341,25 @@ class CIAnalysisTools:
             'vulnerabilities': 'Patent expiration approaching, new entrants'
         }
     
-    def _assess_competitive_threats(self, brand_name: str, competitors: List[Dict]) -> List[Dict[str, Any]]:
+    def _assess_competitive_threats(self, brand_name: str, competitors: List[Dict], risk_scores: List[int]) -> List[Dict[str, Any]]:
         """Assess competitive threats"""
-        threats = []
-        
-        for competitor in competitors[:3]:  # Top 3 threats
-            threat_level = competitor.get('riskScore', 50)
-            
-            threats.append({
+        return [
+            {
                 'competitor': competitor.get('name', 'Unknown'),
                 'threat_level': threat_level,
-                'threat_type': 'Direct Competition' if threat_level > 70 else 'Moderate Competition',
+                'threat_type': 'Direct Competition' if (direct := threat_level > 70) else 'Moderate Competition',
                 'key_differentiators': competitor.get('indications', [])[:2],
-                'estimated_impact': 'High' if threat_level > 70 else 'Medium'
-            })
-        
-        return threats
+                'estimated_impact': 'High' if direct else 'Medium'
+            }
+            for competitor, threat_level in islice(zip(competitors, risk_scores), 3)  # Top 3 threats
+        ]
     
-    def _calculate_competitive_strength(self, brand_data: Dict, competitors: List[Dict]) -> int:
+    def _calculate_competitive_strength(self, brand_data: Dict, risk_scores: List[int]) -> int:
         """Calculate competitive strength score"""
         base_score = brand_data.get('riskScore', 50)
         
         # Adjust based on competitive landscape
-        competitor_avg = sum(c.get('riskScore', 50) for c in competitors) / len(competitors) if competitors else 50
+        competitor_avg = sum(risk_scores) / len(risk_scores) if risk_scores else 50
         
         if base_score > competitor_avg:
             return min(base_score + 10, 100)
@@ -340,15 +377,29 @@ class CIAnalysisTools:
         
         return recommendations
     
+    def _bucket_counts(self, result: Dict[str, Any], agg_name: str) -> Dict[str, int]:
+        """Map an aggregation's buckets to {key: doc_count}"""
+        buckets = result.get('aggregations', {}).get(agg_name, {}).get('buckets', [])
+        # date_histogram keys are epoch millis; prefer the formatted date
+        return {bucket.get('key_as_string', bucket['key']): bucket['doc_count'] for bucket in buckets}
+    
+    def _ok_response(self, function_name: str, body: Dict[str, Any]) -> Dict[str, Any]:
+        """Return analysis result in Bedrock Agent format"""
+        return self._agent_response(function_name, orjson.dumps(body, option=orjson.OPT_INDENT_2).decode())
+    
     def _error_response(self, message: str) -> Dict[str, Any]:
         """Return error response in Bedrock Agent format"""
+        return self._agent_response('error', orjson.dumps({'error': message}).decode())
+    
+    def _agent_response(self, function_name: str, body: str) -> Dict[str, Any]:
+        """Wrap a serialized body in the Bedrock Agent response envelope"""
         return {
             'actionGroup': 'competitive-analysis',
-            'function': 'error',
+            'function': function_name,
             'functionResponse': {
                 'responseBody': {
                     'TEXT': {
-                        'body': json.dumps({'error': message})
+                        'body': body
                     }
                 }
             }
@@ -356,5 +407,6 @@ class CIAnalysisTools:
 
 # Lambda entry point
 def lambda_handler(event, context):
-    tools = CIAnalysisTools()
-    return tools.lambda_handler(event, context)
\ No newline at end of file
+    global _TOOLS
+    _TOOLS = _TOOLS or CIAnalysisTools()
+    return _TOOLS.lambda_handler(event, context)
\ No newline at end of file
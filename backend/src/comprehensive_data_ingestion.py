@@ -1,15 +1,55 @@
-import json
 import os
+import hashlib
 import boto3
+import orjson
 import requests
-import xml.etree.ElementTree as ET
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from io import BytesIO
+from lxml import etree
 from datetime import datetime, timedelta
 from typing import Dict, Any, List, Optional
-from urllib.parse import urlencode
-import time
 import re
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property
 from services.opensearch_service import OpenSearchService
 from services.s3_service import S3Service
+from services.rate_limiter import RateLimiter
+from services.ttl_cache import TTLCache
+
+# Concurrent HTTP requests per ingestion fan-out
+FETCH_WORKERS = 8
+
+# (connect, read) timeout in seconds for upstream API calls
+HTTP_TIMEOUT = (5, 30)
+
+# Attempts per request when the upstream answers 429; each retry goes back through the host's limiter
+RATE_LIMIT_ATTEMPTS = 3
+
+# Concurrent Bedrock invocations, kept low to stay inside model TPS quotas
+BEDROCK_WORKERS = 5
+
+# Pre-serialized Claude request envelope; only the prompt is encoded per call
+_BEDROCK_BODY_PREFIX = b'{"anthropic_version":"bedrock-2023-05-31","max_tokens":500,"messages":[{"role":"user","content":'
+_BEDROCK_BODY_SUFFIX = b'}]}'
+
+# Survive warm Lambda invocations; overlapping searches keep resurfacing the same papers
+_PUBMED_DETAILS_CACHE = TTLCache(maxsize=10000, ttl=6 * 3600)
+_PAPER_ANALYSIS_CACHE = TTLCache(maxsize=10000, ttl=24 * 3600)
+
+# Pharmaceutical brands to monitor
+TARGET_BRANDS = (
+    'keytruda', 'pembrolizumab', 'opdivo', 'nivolumab',
+    'tecentriq', 'atezolizumab', 'imfinzi', 'durvalumab',
+    'bavencio', 'avelumab', 'libtayo', 'cemiplimab',
+    'yervoy', 'ipilimumab', 'provenge', 'sipuleucel-t'
+)
+
+# Compiled once per container: one case-insensitive alternation, one pass over the raw text
+_BRAND_PATTERN = re.compile(
+    r'\b(?:' + '|'.join(re.escape(b) for b in sorted(TARGET_BRANDS, key=len, reverse=True)) + r')\b',
+    re.IGNORECASE
+)
 
 class ComprehensiveDataIngestionPipeline:
     def __init__(self):
@@ -19,18 +59,31 @@ class ComprehensiveDataIngestionPipeline:
         self.bedrock = boto3.client('bedrock-runtime')
         self.alert_topic = os.environ.get('ALERT_TOPIC', '')
         
+        # When set, 'all' runs fan out to one async invocation of this function per source
+        self.ingestion_function_name = os.environ.get('INGESTION_FUNCTION_NAME', '')
+        
         # API Keys and endpoints
         self.fda_api_key = os.environ.get('FDA_API_KEY', '')
         self.pubmed_api_key = os.environ.get('PUBMED_API_KEY', '')
         self.clinicaltrials_api_key = os.environ.get('CLINICALTRIALS_API_KEY', '')
         
+        # Pooled keep-alive session shared by all ingestors; 429s are left to _get and the rate limiters
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=20,
+            pool_maxsize=20,
+            max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[500, 502, 503, 504])
+        )
+        self.session.mount('https://', adapter)
+        
+        # Per-host token buckets at each API's published limit, shared by concurrent fetches
+        self.pubmed_limiter = RateLimiter(10 if self.pubmed_api_key else 3)
+        self.clinicaltrials_limiter = RateLimiter(50, 60)
+        self.fda_limiter = RateLimiter(240, 60)
+        self.uspto_limiter = RateLimiter(2)
+        
         # Pharmaceutical brands to monitor
-        self.target_brands = [
-            'keytruda', 'pembrolizumab', 'opdivo', 'nivolumab', 
-            'tecentriq', 'atezolizumab', 'imfinzi', 'durvalumab',
-            'bavencio', 'avelumab', 'libtayo', 'cemiplimab',
-            'yervoy', 'ipilimumab', 'provenge', 'sipuleucel-t'
-        ]
+        self.target_brands = list(TARGET_BRANDS)
         
         # Therapeutic areas
         self.therapeutic_areas = [
@@ -38,58 +91,78 @@ class ComprehensiveDataIngestionPipeline:
             'lung cancer', 'breast cancer', 'bladder cancer',
             'kidney cancer', 'liver cancer', 'head and neck cancer'
         ]
+        
+        brands_or = ' OR '.join(self.target_brands)
+        areas_or = ' OR '.join(self.therapeutic_areas)
+        
+        # Enhanced search terms for pharmaceutical CI
+        self.pubmed_search_queries = [
+            # Brand-specific searches
+            f"({brands_or})",
+            # Therapeutic area searches
+            f"({areas_or}) AND (clinical trial OR phase)",
+            # Competitive intelligence searches
+            "competitive analysis AND pharmaceutical",
+            "market share AND oncology drugs",
+            "biosimilar AND competition",
+            # Safety and efficacy
+            "adverse events AND immunotherapy",
+            "real world evidence AND cancer drugs"
+        ]
+        
+        # Enhanced clinical trials search
+        self.clinicaltrials_search_expressions = [
+            # Brand-specific trials
+            brands_or,
+            # Phase-specific searches
+            f"({brands_or}) AND Phase 3",
+            f"({brands_or}) AND Phase 2",
+            # Indication-specific searches
+            f"immunotherapy AND ({areas_or})",
+            # Competitive trials
+            "biosimilar AND oncology",
+            "combination therapy AND cancer"
+        ]
+        
+        # Ingestion entry points by source name
+        self.sources = {
+            'pubmed': self.ingest_pubmed_comprehensive,
+            'clinicaltrials': self.ingest_clinicaltrials_comprehensive,
+            'fda': self.ingest_fda_comprehensive,
+            'ema': self.ingest_ema_data,
+            'patents': self.ingest_patent_data,
+            'news': self.ingest_pharma_news,
+            'conferences': self.ingest_conference_data,
+            'sec': self.ingest_sec_filings
+        }
 
+    @cached_property
+    def lambda_client(self):
+        return boto3.client('lambda')
+    
     def lambda_handler(self, event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         """Main comprehensive data ingestion handler"""
         try:
             source = event.get('source', 'all')
             
-            if source == 'pubmed':
-                return self.ingest_pubmed_comprehensive()
-            elif source == 'clinicaltrials':
-                return self.ingest_clinicaltrials_comprehensive()
-            elif source == 'fda':
-                return self.ingest_fda_comprehensive()
-            elif source == 'ema':
-                return self.ingest_ema_data()
-            elif source == 'patents':
-                return self.ingest_patent_data()
-            elif source == 'news':
-                return self.ingest_pharma_news()
-            elif source == 'conferences':
-                return self.ingest_conference_data()
-            elif source == 'sec':
-                return self.ingest_sec_filings()
-            else:
-                return self.run_comprehensive_ingestion()
+            ingest = self.sources.get(source)
+            if ingest:
+                return ingest()
+            if self.ingestion_function_name:
+                return self.dispatch_source_invocations()
+            return self.run_comprehensive_ingestion()
                 
         except Exception as e:
             print(f"Comprehensive ingestion error: {str(e)}")
-            return {'statusCode': 500, 'body': json.dumps({'error': str(e)})}
+            return {'statusCode': 500, 'body': orjson.dumps({'error': str(e)}).decode()}
 
     def ingest_pubmed_comprehensive(self) -> Dict[str, Any]:
         """Comprehensive PubMed data ingestion"""
         try:
-            documents_processed = 0
-            
-            # Enhanced search terms for pharmaceutical CI
-            search_queries = [
-                # Brand-specific searches
-                f"({' OR '.join(self.target_brands)})",
-                # Therapeutic area searches
-                f"({' OR '.join(self.therapeutic_areas)}) AND (clinical trial OR phase)",
-                # Competitive intelligence searches
-                "competitive analysis AND pharmaceutical",
-                "market share AND oncology drugs",
-                "biosimilar AND competition",
-                # Safety and efficacy
-                "adverse events AND immunotherapy",
-                "real world evidence AND cancer drugs"
-            ]
-            
-            for query in search_queries:
-                # PubMed eSearch API
-                search_url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esearch.fcgi"
+            # PubMed eSearch API
+            search_url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esearch.fcgi"
+            search_params_list = []
+            for query in self.pubmed_search_queries:
                 search_params = {
                     'db': 'pubmed',
                     'term': query,
@@ -103,95 +176,115 @@ class ComprehensiveDataIngestionPipeline:
                 if self.pubmed_api_key:
                     search_params['api_key'] = self.pubmed_api_key
                 
-                response = requests.get(search_url, params=search_params)
-                if response.status_code == 200:
-                    data = response.json()
-                    pmids = data.get('esearchresult', {}).get('idlist', [])
-                    
-                    # Fetch detailed information for each paper
-                    for pmid_batch in self._batch_list(pmids, 20):
-                        papers_data = self.fetch_pubmed_details(pmid_batch)
-                        for paper in papers_data:
-                            if paper:
-                                self.process_research_paper_enhanced(paper)
-                                documents_processed += 1
-                
-                # Rate limiting
-                time.sleep(0.5)
+                search_params_list.append(search_params)
+            
+            search_results = self._run_concurrently(
+                lambda params: self._get_json(search_url, params, self.pubmed_limiter),
+                search_params_list
+            )
+            
+            # Overlapping queries return the same PMIDs; fetch each one once
+            pmids = list(dict.fromkeys(
+                pmid
+                for data in search_results
+                if data
+                for pmid in data.get('esearchresult', {}).get('idlist', [])
+            ))
+            
+            papers = []
+            uncached_pmids = []
+            for pmid in pmids:
+                paper = _PUBMED_DETAILS_CACHE.get(pmid)
+                if paper:
+                    papers.append(paper)
+                else:
+                    uncached_pmids.append(pmid)
+            
+            # Fetch detailed information for each paper
+            pmid_batches = self._chunks(uncached_pmids, 20)
+            for papers_data in self._run_concurrently(self.fetch_pubmed_details, pmid_batches):
+                for paper in papers_data:
+                    if paper:
+                        _PUBMED_DETAILS_CACHE.set(paper.get('pmid'), paper)
+                        papers.append(paper)
+            documents_processed = len(papers)
+            
+            # Bedrock analysis dominates per-paper latency; overlap the calls
+            processed_at = datetime.now().isoformat()
+            processed_papers = self._run_concurrently(
+                lambda paper: self.process_research_paper_enhanced(paper, processed_at),
+                papers,
+                max_workers=BEDROCK_WORKERS
+            )
+            paper_docs = [doc for doc in processed_papers if doc]
+            
+            self.s3.store_metadata_batch([(f"papers/{doc['id']}.json", doc) for doc in paper_docs])
+            self.opensearch.bulk_index('papers', paper_docs)
             
             return {
                 'statusCode': 200,
-                'body': json.dumps({
+                'body': orjson.dumps({
                     'message': f'Processed {documents_processed} PubMed documents',
                     'source': 'pubmed_comprehensive'
-                })
+                }).decode()
             }
             
         except Exception as e:
-            return {'statusCode': 500, 'body': json.dumps({'error': str(e)})}
+            return {'statusCode': 500, 'body': orjson.dumps({'error': str(e)}).decode()}
 
     def ingest_clinicaltrials_comprehensive(self) -> Dict[str, Any]:
         """Comprehensive ClinicalTrials.gov data ingestion"""
         try:
             trials_processed = 0
             
-            # Enhanced clinical trials search
-            search_expressions = [
-                # Brand-specific trials
-                ' OR '.join(self.target_brands),
-                # Phase-specific searches
-                f"({' OR '.join(self.target_brands)}) AND Phase 3",
-                f"({' OR '.join(self.target_brands)}) AND Phase 2",
-                # Indication-specific searches
-                f"immunotherapy AND ({' OR '.join(self.therapeutic_areas)})",
-                # Competitive trials
-                "biosimilar AND oncology",
-                "combination therapy AND cancer"
-            ]
-            
-            for expression in search_expressions:
-                # ClinicalTrials.gov API v2
-                base_url = "https://clinicaltrials.gov/api/v2/studies"
-                params = {
+            # ClinicalTrials.gov API v2
+            base_url = "https://clinicaltrials.gov/api/v2/studies"
+            last_update = (datetime.now() - timedelta(days=90)).strftime('%Y-%m-%d')
+            params_list = [
+                {
                     'query.term': expression,
                     'query.locn': 'United States',
                     'filter.overallStatus': 'RECRUITING|ACTIVE_NOT_RECRUITING|COMPLETED',
-                    'filter.lastUpdatePostDate': (datetime.now() - timedelta(days=90)).strftime('%Y-%m-%d'),
+                    'filter.lastUpdatePostDate': last_update,
                     'pageSize': 100,
                     'format': 'json'
                 }
+                for expression in self.clinicaltrials_search_expressions
+            ]
+            
+            responses = self._run_concurrently(
+                lambda params: self._get_json(base_url, params, self.clinicaltrials_limiter),
+                params_list
+            )
+            
+            trial_docs = []
+            processed_at = datetime.now().isoformat()
+            for data in responses:
+                if not data:
+                    continue
                 
-                response = requests.get(base_url, params=params)
-                if response.status_code == 200:
-                    data = response.json()
-                    studies = data.get('studies', [])
-                    
-                    for study in studies:
-                        trial_data = self.process_clinical_trial_enhanced(study)
-                        if trial_data:
-                            # Store in OpenSearch
-                            self.opensearch.index_document(
-                                'trials',
-                                trial_data['id'],
-                                trial_data
-                            )
-                            
-                            # AI-powered competitive analysis
-                            self.analyze_trial_competitive_impact(trial_data)
-                            trials_processed += 1
-                
-                time.sleep(1)  # Rate limiting
+                for study in data.get('studies', []):
+                    trial_data = self.process_clinical_trial_enhanced(study, processed_at)
+                    if trial_data:
+                        trial_docs.append(trial_data)
+                        
+                        # AI-powered competitive analysis
+                        self.analyze_trial_competitive_impact(trial_data)
+                        trials_processed += 1
+            
+            # Store in OpenSearch
+            self.opensearch.bulk_index('trials', trial_docs)
             
             return {
                 'statusCode': 200,
-                'body': json.dumps({
+                'body': orjson.dumps({
                     'message': f'Processed {trials_processed} clinical trials',
                     'source': 'clinicaltrials_comprehensive'
-                })
+                }).decode()
             }
             
         except Exception as e:
-            return {'statusCode': 500, 'body': json.dumps({'error': str(e)})}
+            return {'statusCode': 500, 'body': orjson.dumps({'error': str(e)}).decode()}
 
     def ingest_fda_comprehensive(self) -> Dict[str, Any]:
         """Comprehensive FDA data ingestion"""
@@ -217,6 +310,7 @@ class ComprehensiveDataIngestionPipeline:
                 }
             ]
             
+            requests_list = []
             for endpoint in fda_endpoints:
                 for brand in self.target_brands:
                     params = {
@@ -227,39 +321,46 @@ class ComprehensiveDataIngestionPipeline:
                     if self.fda_api_key:
                         params['api_key'] = self.fda_api_key
                     
-                    response = requests.get(endpoint['url'], params=params)
-                    if response.status_code == 200:
-                        data = response.json()
-                        results = data.get('results', [])
+                    requests_list.append((endpoint, brand, params))
+            
+            responses = self._run_concurrently(
+                lambda request: self._get_json(request[0]['url'], request[2], self.fda_limiter),
+                requests_list
+            )
+            
+            regulatory_docs = []
+            raw_records = []
+            processed_at = datetime.now().isoformat()
+            for (endpoint, brand, _), data in zip(requests_list, responses):
+                if not data:
+                    continue
+                
+                for result in data.get('results', []):
+                    processed_data = self.process_fda_data_enhanced(
+                        result, endpoint['type'], brand, processed_at
+                    )
+                    if processed_data:
+                        regulatory_docs.append(processed_data)
+                        raw_records.append((processed_data['rawDataS3Key'], result))
                         
-                        for result in results:
-                            processed_data = self.process_fda_data_enhanced(
-                                result, endpoint['type'], brand
-                            )
-                            if processed_data:
-                                # Store in OpenSearch
-                                self.opensearch.index_document(
-                                    'regulatory',
-                                    processed_data['id'],
-                                    processed_data
-                                )
-                                
-                                # Check for critical alerts
-                                self.check_regulatory_alerts(processed_data)
-                                events_processed += 1
-                    
-                    time.sleep(0.2)  # Rate limiting
+                        # Check for critical alerts
+                        self.check_regulatory_alerts(processed_data)
+                        events_processed += 1
+            
+            # Raw openFDA records go to S3; OpenSearch keeps only the extracted fields
+            self.s3.store_metadata_batch(raw_records, compress=True)
+            self.opensearch.bulk_index('regulatory', regulatory_docs)
             
             return {
                 'statusCode': 200,
-                'body': json.dumps({
+                'body': orjson.dumps({
                     'message': f'Processed {events_processed} FDA events',
                     'source': 'fda_comprehensive'
-                })
+                }).decode()
             }
             
         except Exception as e:
-            return {'statusCode': 500, 'body': json.dumps({'error': str(e)})}
+            return {'statusCode': 500, 'body': orjson.dumps({'error': str(e)}).decode()}
 
     def ingest_ema_data(self) -> Dict[str, Any]:
         """Ingest European Medicines Agency data"""
@@ -280,19 +381,20 @@ class ComprehensiveDataIngestionPipeline:
             
             return {
                 'statusCode': 200,
-                'body': json.dumps({
+                'body': orjson.dumps({
                     'message': f'EMA data ingestion placeholder - {documents_processed} documents',
                     'source': 'ema'
-                })
+                }).decode()
             }
             
         except Exception as e:
-            return {'statusCode': 500, 'body': json.dumps({'error': str(e)})}
+            return {'statusCode': 500, 'body': orjson.dumps({'error': str(e)}).decode()}
 
     def ingest_patent_data(self) -> Dict[str, Any]:
         """Ingest patent data from USPTO and other sources"""
         try:
             patents_processed = 0
+            patent_docs = []
             
             # USPTO Patent API
             for brand in self.target_brands:
@@ -303,33 +405,28 @@ class ComprehensiveDataIngestionPipeline:
                     'limit': 50
                 }
                 
-                response = requests.get(search_url, params=params)
-                if response.status_code == 200:
-                    data = response.json()
+                data = self._get_json(search_url, params, self.uspto_limiter)
+                if data:
                     trials = data.get('results', [])
                     
                     for trial in trials:
                         patent_data = self.process_patent_data(trial, brand)
                         if patent_data:
-                            self.opensearch.index_document(
-                                'patents',
-                                patent_data['id'],
-                                patent_data
-                            )
+                            patent_docs.append(patent_data)
                             patents_processed += 1
-                
-                time.sleep(0.5)
+            
+            self.opensearch.bulk_index('patents', patent_docs)
             
             return {
                 'statusCode': 200,
-                'body': json.dumps({
+                'body': orjson.dumps({
                     'message': f'Processed {patents_processed} patents',
                     'source': 'patents'
-                })
+                }).decode()
             }
             
         except Exception as e:
-            return {'statusCode': 500, 'body': json.dumps({'error': str(e)})}
+            return {'statusCode': 500, 'body': orjson.dumps({'error': str(e)}).decode()}
 
     def ingest_pharma_news(self) -> Dict[str, Any]:
         """Ingest pharmaceutical news and market intelligence"""
@@ -350,14 +447,14 @@ class ComprehensiveDataIngestionPipeline:
             
             return {
                 'statusCode': 200,
-                'body': json.dumps({
+                'body': orjson.dumps({
                     'message': f'News ingestion placeholder - {news_processed} articles',
                     'source': 'news'
-                })
+                }).decode()
             }
             
         except Exception as e:
-            return {'statusCode': 500, 'body': json.dumps({'error': str(e)})}
+            return {'statusCode': 500, 'body': orjson.dumps({'error': str(e)}).decode()}
 
     def ingest_conference_data(self) -> Dict[str, Any]:
         """Ingest medical conference abstracts and presentations"""
@@ -373,14 +470,14 @@ class ComprehensiveDataIngestionPipeline:
             
             return {
                 'statusCode': 200,
-                'body': json.dumps({
+                'body': orjson.dumps({
                     'message': f'Conference data placeholder - {abstracts_processed} abstracts',
                     'source': 'conferences'
-                })
+                }).decode()
             }
             
         except Exception as e:
-            return {'statusCode': 500, 'body': json.dumps({'error': str(e)})}
+            return {'statusCode': 500, 'body': orjson.dumps({'error': str(e)}).decode()}
 
     def ingest_sec_filings(self) -> Dict[str, Any]:
         """Ingest SEC filings for pharmaceutical companies"""
@@ -401,14 +498,14 @@ class ComprehensiveDataIngestionPipeline:
             
             return {
                 'statusCode': 200,
-                'body': json.dumps({
+                'body': orjson.dumps({
                     'message': f'SEC filings placeholder - {filings_processed} filings',
                     'source': 'sec'
-                })
+                }).decode()
             }
             
         except Exception as e:
-            return {'statusCode': 500, 'body': json.dumps({'error': str(e)})}
+            return {'statusCode': 500, 'body': orjson.dumps({'error': str(e)}).decode()}
 
     def fetch_pubmed_details(self, pmids: List[str]) -> List[Dict[str, Any]]:
         """Fetch detailed PubMed article information"""
@@ -424,9 +521,9 @@ class ComprehensiveDataIngestionPipeline:
             if self.pubmed_api_key:
                 params['api_key'] = self.pubmed_api_key
             
-            response = requests.get(fetch_url, params=params)
-            if response.status_code == 200:
-                return self.parse_pubmed_xml(response.text)
+            response = self._get(fetch_url, params, self.pubmed_limiter)
+            if response.status_code == 200 and response.content:
+                return self.parse_pubmed_xml(response.content)
             
             return []
             
@@ -434,60 +531,67 @@ class ComprehensiveDataIngestionPipeline:
             print(f"Error fetching PubMed details: {str(e)}")
             return []
 
-    def parse_pubmed_xml(self, xml_content: str) -> List[Dict[str, Any]]:
-        """Parse PubMed XML response"""
+    def parse_pubmed_xml(self, xml_content: bytes) -> List[Dict[str, Any]]:
+        """Parse PubMed XML response, streaming one article at a time"""
         try:
-            root = ET.fromstring(xml_content)
             papers = []
             
-            for article in root.findall('.//PubmedArticle'):
+            for _, article in etree.iterparse(BytesIO(xml_content), tag='PubmedArticle'):
                 paper_data = {}
+                citation = article.find('MedlineCitation')
+                details = citation.find('Article') if citation is not None else None
                 
                 # Extract PMID
-                pmid_elem = article.find('.//PMID')
+                pmid_elem = citation.find('PMID') if citation is not None else None
                 if pmid_elem is not None:
                     paper_data['pmid'] = pmid_elem.text
                 
-                # Extract title
-                title_elem = article.find('.//ArticleTitle')
-                if title_elem is not None:
-                    paper_data['title'] = title_elem.text or ''
-                
-                # Extract abstract
-                abstract_elem = article.find('.//AbstractText')
-                if abstract_elem is not None:
-                    paper_data['abstract'] = abstract_elem.text or ''
-                
-                # Extract authors
                 authors = []
-                for author in article.findall('.//Author'):
-                    lastname = author.find('LastName')
-                    forename = author.find('ForeName')
-                    if lastname is not None and forename is not None:
-                        authors.append(f"{forename.text} {lastname.text}")
-                paper_data['authors'] = authors
-                
-                # Extract journal
-                journal_elem = article.find('.//Journal/Title')
-                if journal_elem is not None:
-                    paper_data['journal'] = journal_elem.text
-                
-                # Extract publication date
-                pub_date = article.find('.//PubDate')
-                if pub_date is not None:
-                    year = pub_date.find('Year')
-                    month = pub_date.find('Month')
-                    day = pub_date.find('Day')
+                if details is not None:
+                    # Extract title
+                    title_elem = details.find('ArticleTitle')
+                    if title_elem is not None:
+                        paper_data['title'] = title_elem.text or ''
+                    
+                    # Extract abstract
+                    abstract_elem = details.find('Abstract/AbstractText')
+                    if abstract_elem is not None:
+                        paper_data['abstract'] = abstract_elem.text or ''
                     
-                    if year is not None:
-                        date_str = year.text
-                        if month is not None:
-                            date_str += f"-{month.text}"
-                        if day is not None:
-                            date_str += f"-{day.text}"
-                        paper_data['published_date'] = date_str
+                    # Extract authors
+                    for author in details.iterfind('AuthorList/Author'):
+                        lastname = author.find('LastName')
+                        forename = author.find('ForeName')
+                        if lastname is not None and forename is not None:
+                            authors.append(f"{forename.text} {lastname.text}")
+                    
+                    # Extract journal
+                    journal_elem = details.find('Journal/Title')
+                    if journal_elem is not None:
+                        paper_data['journal'] = journal_elem.text
+                    
+                    # Extract publication date
+                    pub_date = details.find('Journal/JournalIssue/PubDate')
+                    if pub_date is not None:
+                        year = pub_date.find('Year')
+                        month = pub_date.find('Month')
+                        day = pub_date.find('Day')
+                        
+                        if year is not None:
+                            date_str = year.text
+                            if month is not None:
+                                date_str += f"-{month.text}"
+                            if day is not None:
+                                date_str += f"-{day.text}"
+                            paper_data['published_date'] = date_str
+                paper_data['authors'] = authors
                 
                 papers.append(paper_data)
+                
+                # Release the parsed article and any preceding siblings
+                article.clear()
+                while article.getprevious() is not None:
+                    del article.getparent()[0]
             
             return papers
             
@@ -495,8 +599,8 @@ class ComprehensiveDataIngestionPipeline:
             print(f"Error parsing PubMed XML: {str(e)}")
             return []
 
-    def process_research_paper_enhanced(self, paper_data: Dict[str, Any]) -> None:
-        """Enhanced research paper processing with AI analysis"""
+    def process_research_paper_enhanced(self, paper_data: Dict[str, Any], processed_at: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Enhanced research paper processing with AI analysis; returns the document to store and index"""
         try:
             # Extract competitive intelligence
             brands_mentioned = self.extract_brand_mentions(
@@ -516,22 +620,51 @@ class ComprehensiveDataIngestionPipeline:
                 'brandsmentioned': brands_mentioned,
                 'competitiveInsights': competitive_insights,
                 'source': 'pubmed',
-                'processedAt': datetime.now().isoformat(),
+                'processedAt': processed_at or datetime.now().isoformat(),
                 'documentType': 'research_paper'
             }
             
-            # Store in S3 and OpenSearch
-            self.s3.store_metadata(f"papers/{paper_data.get('pmid', '')}.json", processed_data)
-            self.opensearch.index_document('papers', paper_data.get('pmid', ''), processed_data)
+        except Exception as e:
+            print(f"Error processing paper: {str(e)}")
+            return None
+        
+        # Generate alerts for high-impact papers; an alert failure must not drop the paper
+        if competitive_insights.get('impact_score', 0) > 7:
+            self.generate_research_alert(processed_data)
+        
+        return processed_data
+    
+    def generate_research_alert(self, paper: Dict[str, Any]) -> None:
+        """Store an alert for a high-impact paper and notify subscribers"""
+        try:
+            insights = paper.get('competitiveInsights', {})
+            impact_score = insights.get('impact_score', 0)
+            alert_data = {
+                'id': f"research-alert-{paper['id']}",
+                'title': f"High-Impact Research: {paper.get('title', '')}",
+                'severity': 'high' if impact_score >= 9 else 'medium',
+                'source': 'Research',
+                'brandImpacted': paper.get('brandsmentioned', []),
+                'description': f"PubMed {paper['id']} scored competitive impact {impact_score}",
+                'whyItMatters': insights.get('key_findings', ''),
+                'createdAt': paper.get('processedAt') or datetime.now().isoformat(),
+                'confidenceScore': insights.get('confidence', 50)
+            }
             
-            # Generate alerts for high-impact papers
-            if competitive_insights.get('impact_score', 0) > 7:
-                self.generate_research_alert(processed_data)
+            self.opensearch.index_document('alerts', alert_data['id'], alert_data)
             
+            # Send SNS notification for high alerts
+            if alert_data['severity'] == 'high' and self.alert_topic:
+                self.sns.publish(
+                    TopicArn=self.alert_topic,
+                    Message=orjson.dumps(alert_data).decode(),
+                    Subject=f"High Alert: {alert_data['title']}"[:100]
+                )
+                
         except Exception as e:
-            print(f"Error processing paper: {str(e)}")
+            print(f"Error generating research alert: {str(e)}")
 
-    def process_clinical_trial_enhanced(self, study: Dict[str, Any]) -> Dict[str, Any]:
+    def process_clinical_trial_enhanced(self, study: Dict[str, Any], processed_at: Optional[str] = None) -> Dict[str, Any]:
         """Enhanced clinical trial processing"""
         try:
             protocol_section = study.get('protocolSection', {})
@@ -557,7 +690,7 @@ class ComprehensiveDataIngestionPipeline:
                 'brandsInvolved': self.extract_brand_mentions(identification.get('briefTitle', '')),
                 'competitiveImpact': self.assess_trial_competitive_impact(study),
                 'source': 'clinicaltrials.gov',
-                'processedAt': datetime.now().isoformat(),
+                'processedAt': processed_at or datetime.now().isoformat(),
                 'documentType': 'clinical_trial'
             }
             
@@ -567,17 +700,22 @@ class ComprehensiveDataIngestionPipeline:
             print(f"Error processing trial: {str(e)}")
             return {}
 
-    def process_fda_data_enhanced(self, data: Dict[str, Any], data_type: str, brand: str) -> Dict[str, Any]:
+    def process_fda_data_enhanced(self, data: Dict[str, Any], data_type: str, brand: str, processed_at: Optional[str] = None) -> Dict[str, Any]:
         """Enhanced FDA data processing"""
         try:
+            # Stable content hash so re-ingesting a record overwrites the same document
+            digest = hashlib.blake2b(
+                orjson.dumps(data, option=orjson.OPT_SORT_KEYS), digest_size=16
+            ).hexdigest()
+            doc_id = f"fda-{data_type}-{digest}"
             processed_data = {
-                'id': f"fda-{data_type}-{hash(str(data))}",
+                'id': doc_id,
                 'dataType': data_type,
                 'brand': brand,
-                'rawData': data,
+                'rawDataS3Key': f"fda/{doc_id}.json.gz",
                 'competitiveImpact': self.assess_fda_competitive_impact(data, data_type),
                 'source': 'fda',
-                'processedAt': datetime.now().isoformat(),
+                'processedAt': processed_at or datetime.now().isoformat(),
                 'documentType': 'regulatory_data'
             }
             
@@ -597,6 +735,14 @@ class ComprehensiveDataIngestionPipeline:
 
     def analyze_paper_competitive_impact(self, paper_data: Dict[str, Any]) -> Dict[str, Any]:
         """AI-powered analysis of research paper competitive impact"""
+        cache_key = hashlib.blake2b(
+            f"{paper_data.get('title', '')}\n{paper_data.get('abstract', '')}".encode('utf-8'),
+            digest_size=16
+        ).hexdigest()
+        cached = _PAPER_ANALYSIS_CACHE.get(cache_key)
+        if cached:
+            return cached
+        
         try:
             # Use Bedrock for competitive analysis
             prompt = f"""
@@ -605,35 +751,29 @@ class ComprehensiveDataIngestionPipeline:
             Title: {paper_data.get('title', '')}
             Abstract: {paper_data.get('abstract', '')[:1000]}
             
-            Assess:
-            1. Competitive impact score (1-10)
-            2. Brands mentioned and their context
-            3. Key findings that affect market dynamics
-            4. Potential regulatory implications
-            5. Strategic recommendations
-            
-            Provide structured JSON response.
+            Respond with only a JSON object, no other text:
+            {{"impact_score": <competitive impact 1-10>, "brands": [<brands mentioned>], "findings": "<key findings affecting market dynamics>"}}
             """
             
             response = self.bedrock.invoke_model(
                 modelId='anthropic.claude-3-sonnet-20240229-v1:0',
-                body=json.dumps({
-                    'anthropic_version': 'bedrock-2023-05-31',
-                    'max_tokens': 500,
-                    'messages': [{'role': 'user', 'content': prompt}]
-                })
+                body=_BEDROCK_BODY_PREFIX + orjson.dumps(prompt) + _BEDROCK_BODY_SUFFIX
             )
             
-            response_body = json.loads(response['body'].read())
+            response_body = orjson.loads(response['body'].read())
             analysis = response_body['content'][0]['text']
             
-            # Parse AI response (simplified)
-            return {
-                'impact_score': 7,  # Would extract from AI response
-                'key_findings': analysis[:200],
-                'brands_affected': self.extract_brand_mentions(analysis),
+            # Tolerate stray prose around the requested JSON object
+            parsed = orjson.loads(analysis[analysis.find('{'):analysis.rfind('}') + 1])
+            
+            insights = {
+                'impact_score': min(max(int(parsed.get('impact_score', 5)), 1), 10),
+                'key_findings': str(parsed.get('findings', ''))[:200],
+                'brands_affected': sorted({str(brand).lower() for brand in parsed.get('brands', [])}),
                 'confidence': 85
             }
+            _PAPER_ANALYSIS_CACHE.set(cache_key, insights)
+            return insights
             
         except Exception as e:
             print(f"Error in AI analysis: {str(e)}")
@@ -644,52 +784,85 @@ class ComprehensiveDataIngestionPipeline:
         if not text:
             return []
         
-        text_lower = text.lower()
-        mentioned_brands = []
-        
-        for brand in self.target_brands:
-            if brand.lower() in text_lower:
-                mentioned_brands.append(brand)
-        
-        return list(set(mentioned_brands))
+        return list({match.group(0).lower() for match in _BRAND_PATTERN.finditer(text)})
 
-    def _batch_list(self, items: List, batch_size: int) -> List[List]:
+    def _get(self, url: str, params: Dict[str, Any], limiter: RateLimiter) -> requests.Response:
+        """Rate-limited GET; a 429 pauses the whole host for its Retry-After, then the request is retried"""
+        for _ in range(RATE_LIMIT_ATTEMPTS):
+            limiter.wait()
+            response = self.session.get(url, params=params, timeout=HTTP_TIMEOUT)
+            if response.status_code != 429:
+                break
+            
+            retry_after = response.headers.get('Retry-After', '')
+            limiter.pause(float(retry_after) if retry_after.isdigit() else 1.0)
+        return response
+    
+    def _get_json(self, url: str, params: Dict[str, Any], limiter: RateLimiter) -> Optional[Dict[str, Any]]:
+        """Rate-limited GET returning the parsed JSON body, or None on failure or an empty body"""
+        try:
+            response = self._get(url, params, limiter)
+            # openFDA answers zero-match searches with 404; skip those and empty bodies unparsed
+            if response.status_code == 200 and response.content:
+                return orjson.loads(response.content)
+            return None
+        except Exception as e:
+            print(f"Error fetching {url}: {str(e)}")
+            return None
+    
+    def _run_concurrently(self, fn, items: List, max_workers: int = FETCH_WORKERS) -> List:
+        """Run an I/O-bound call over items in a thread pool, preserving order"""
+        if not items:
+            return []
+        
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as executor:
+            return list(executor.map(fn, items))
+    
+    @staticmethod
+    def _chunks(items: List, size: int) -> List[List]:
         """Split list into batches"""
-        for i in range(0, len(items), batch_size):
-            yield items[i:i + batch_size]
+        return [items[i:i + size] for i in range(0, len(items), size)]
 
+    def dispatch_source_invocations(self) -> Dict[str, Any]:
+        """Invoke this function asynchronously once per source so each gets its own container and timeout"""
+        results = []
+        for source in self.sources:
+            try:
+                self.lambda_client.invoke(
+                    FunctionName=self.ingestion_function_name,
+                    InvocationType='Event',
+                    Payload=orjson.dumps({'source': source})
+                )
+                results.append({'source': source, 'status': 'dispatched'})
+            except Exception as e:
+                results.append({'source': source, 'status': 'error', 'message': str(e)})
+        
+        return {
+            'statusCode': 202,
+            'body': orjson.dumps({
+                'message': 'Comprehensive ingestion dispatched',
+                'results': results
+            }).decode()
+        }
+    
     def run_comprehensive_ingestion(self) -> Dict[str, Any]:
-        """Run all data sources in comprehensive ingestion"""
+        """Run all data sources concurrently in comprehensive ingestion"""
         results = []
         
-        sources = [
-            'pubmed', 'clinicaltrials', 'fda', 'ema', 
-            'patents', 'news', 'conferences', 'sec'
-        ]
+        # Sources hit independent hosts with their own rate limiters
+        with ThreadPoolExecutor(max_workers=len(self.sources)) as executor:
+            futures = {
+                source: executor.submit(ingest)
+                for source, ingest in self.sources.items()
+            }
         
-        for source in sources:
+        for source, future in futures.items():
             try:
-                if source == 'pubmed':
-                    result = self.ingest_pubmed_comprehensive()
-                elif source == 'clinicaltrials':
-                    result = self.ingest_clinicaltrials_comprehensive()
-                elif source == 'fda':
-                    result = self.ingest_fda_comprehensive()
-                elif source == 'ema':
-                    result = self.ingest_ema_data()
-                elif source == 'patents':
-                    result = self.ingest_patent_data()
-                elif source == 'news':
-                    result = self.ingest_pharma_news()
-                elif source == 'conferences':
-                    result = self.ingest_conference_data()
-                elif source == 'sec':
-                    result = self.ingest_sec_filings()
-                
+                result = future.result()
                 results.append({
                     'source': source,
                     'status': 'success' if result['statusCode'] == 200 else 'error',
-                    'message': json.loads(result['body']).get('message', '')
+                    'message': orjson.loads(result['body']).get('message', '')
                 })
                 
             except Exception as e:
@@ -701,10 +874,10 @@ class ComprehensiveDataIngestionPipeline:
         
         return {
             'statusCode': 200,
-            'body': json.dumps({
+            'body': orjson.dumps({
                 'message': 'Comprehensive ingestion completed',
                 'results': results
-            })
+            }).decode()
         }
 
 # Lambda entry point
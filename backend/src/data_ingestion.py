@@ -1,22 +1,100 @@
-import json
+import orjson
 import os
+import re
+import hashlib
+import uuid
 import boto3
+from botocore.config import Config
 import requests
+from requests.adapters import HTTPAdapter
+from urllib.parse import urlencode
+from lxml import etree
 from datetime import datetime, timedelta
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
+from concurrent.futures import ThreadPoolExecutor
 from services.opensearch_service import OpenSearchService
 from services.s3_service import S3Service
+from services.ttl_cache import TTLCache
+from services.http_retry import JitteredRetry
+
+# Concurrent HTTP requests per ingestion fan-out
+FETCH_WORKERS = 8
+
+# Timeout in seconds for upstream API calls
+HTTP_TIMEOUT = 5
+
+# Maximum PMIDs NCBI accepts in one ESummary request
+PUBMED_SUMMARY_BATCH = 200
+
+# Maximum entries SNS accepts in one PublishBatch request
+SNS_BATCH_SIZE = 10
+
+# Upstream results change over hours, so warm invocations reuse recent responses
+_RESPONSE_CACHE = TTLCache(maxsize=512, ttl=900)
+
+# Pharmaceutical brands tracked in ingested text
+TARGET_BRANDS = (
+    'keytruda', 'pembrolizumab',
+    'opdivo', 'nivolumab',
+    'tecentriq', 'atezolizumab',
+    'imfinzi', 'durvalumab'
+)
+
+# Compiled once per container: one case-insensitive pass over the raw text
+_BRAND_PATTERN = re.compile(r'\b(?:' + '|'.join(TARGET_BRANDS) + r')\b', re.IGNORECASE)
+
+# PubMed search terms for pharmaceutical intelligence
+PUBMED_SEARCH_TERMS = (
+    'pembrolizumab', 'nivolumab', 'atezolizumab',
+    'PD-1 inhibitor', 'immunotherapy', 'cancer treatment'
+)
+
+# All terms in one boolean ESearch query, built once per container
+_PUBMED_QUERY = ' OR '.join(f'({term})' for term in dict.fromkeys(PUBMED_SEARCH_TERMS))
+
+# Molecules whose trials always raise an alert
+ALERT_MOLECULES = frozenset({'pembrolizumab', 'nivolumab', 'atezolizumab'})
+
+_SNS_CONFIG = Config(
+    tcp_keepalive=True,
+    max_pool_connections=16,
+    retries={'max_attempts': 3, 'mode': 'adaptive'}
+)
+
+# Reused across warm invocations so clients and HTTP pools are built once per container
+_HANDLER = None
 
 class DataIngestionHandler:
     def __init__(self):
         self.opensearch = OpenSearchService()
         self.s3 = S3Service()
-        self.sns = boto3.client('sns')
+        self.sns = boto3.client('sns', config=_SNS_CONFIG)
         self.alert_topic = os.environ.get('ALERT_TOPIC', '')
+        self._now_iso = None
+        
+        # NCBI allows 10 req/s with an API key instead of 3
+        self.pubmed_api_key = os.environ.get('PUBMED_API_KEY', '')
+        
+        # Pooled keep-alive session shared by all ingestors; throttling and 5xx retry with jittered backoff
+        self.http = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=8,
+            pool_maxsize=32,
+            max_retries=JitteredRetry(
+                total=5,
+                backoff_factor=0.5,
+                status_forcelist=[429, 500, 502, 503, 504],
+                respect_retry_after_header=True
+            )
+        )
+        self.http.mount('https://', adapter)
     
     def lambda_handler(self, event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         """Main data ingestion handler"""
         try:
+            # One timestamp for every document and alert written by this invocation
+            self._now_iso = datetime.now().isoformat()
+            
             # Determine data source from event
             source = event.get('source', 'scheduled')
             
@@ -34,56 +112,52 @@ class DataIngestionHandler:
                 
         except Exception as e:
             print(f"Data ingestion error: {str(e)}")
-            return {
-                'statusCode': 500,
-                'body': json.dumps({'error': str(e)})
-            }
+            return self._error_response(str(e))
     
     def ingest_pubmed_data(self) -> Dict[str, Any]:
         """Ingest research papers from PubMed"""
         try:
-            # PubMed search terms for pharmaceutical intelligence
-            search_terms = [
-                'pembrolizumab', 'nivolumab', 'atezolizumab',
-                'PD-1 inhibitor', 'immunotherapy', 'cancer treatment'
-            ]
+            # One boolean ESearch covers every term
+            url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esearch.fcgi"
+            params = {
+                'db': 'pubmed',
+                'term': _PUBMED_QUERY,
+                'retmode': 'json',
+                'retmax': 20 * len(PUBMED_SEARCH_TERMS),
+                'datetype': 'pdat',
+                'reldate': 7  # Last 7 days
+            }
+            if self.pubmed_api_key:
+                params['api_key'] = self.pubmed_api_key
             
-            documents_processed = 0
+            data = self._get_json(url, params) or {}
+            pmids = data.get('esearchresult', {}).get('idlist', [])
             
-            for term in search_terms:
-                # PubMed API call (simplified)
-                url = f"https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esearch.fcgi"
-                params = {
-                    'db': 'pubmed',
-                    'term': term,
-                    'retmode': 'json',
-                    'retmax': 20,
-                    'datetype': 'pdat',
-                    'reldate': 7  # Last 7 days
-                }
-                
-                response = requests.get(url, params=params)
-                if response.status_code == 200:
-                    data = response.json()
-                    pmids = data.get('esearchresult', {}).get('idlist', [])
-                    
-                    # Process each paper
-                    for pmid in pmids:
-                        paper_data = self.fetch_paper_details(pmid)
-                        if paper_data:
-                            self.process_research_paper(paper_data)
-                            documents_processed += 1
+            # Paper details in ESummary batches rather than one request per PMID
+            pmid_batches = [
+                pmids[i:i + PUBMED_SUMMARY_BATCH]
+                for i in range(0, len(pmids), PUBMED_SUMMARY_BATCH)
+            ]
+            paper_docs = [
+                processed_data
+                for papers in self._run_concurrently(self.fetch_paper_details, pmid_batches)
+                for paper_data in papers
+                if (processed_data := self.process_research_paper(paper_data))
+            ]
+            documents_processed = len(paper_docs)
             
-            return {
-                'statusCode': 200,
-                'body': json.dumps({
-                    'message': f'Processed {documents_processed} PubMed documents',
-                    'source': 'pubmed'
-                })
-            }
+            # Store in S3 as one gzipped JSONL object and index in OpenSearch in one bulk request
+            if paper_docs:
+                self.s3.store_jsonl(f"papers/{self._timestamp()[:10]}/{uuid.uuid4()}.jsonl.gz", paper_docs)
+            self.opensearch.bulk_index('papers', paper_docs)
+            
+            return self._ok_response({
+                'message': f'Processed {documents_processed} PubMed documents',
+                'source': 'pubmed'
+            })
             
         except Exception as e:
-            return {'statusCode': 500, 'body': json.dumps({'error': str(e)})}
+            return self._error_response(str(e))
     
     def ingest_clinical_trials(self) -> Dict[str, Any]:
         """Ingest clinical trials data"""
@@ -100,34 +174,35 @@ class DataIngestionHandler:
                 'fmt': 'json'
             }
             
-            response = requests.get(base_url, params=params)
-            if response.status_code == 200:
-                data = response.json()
+            data = self._get_json(base_url, params)
+            if data is not None:
                 studies = data.get('StudyFieldsResponse', {}).get('StudyFields', [])
                 
+                trial_docs = []
+                alerts = []
                 for study in studies:
                     trial_data = self.process_clinical_trial(study)
                     if trial_data:
-                        # Store in OpenSearch
-                        self.opensearch.index_document(
-                            'trials',
-                            trial_data['id'],
-                            trial_data
-                        )
+                        trial_docs.append(trial_data)
                         
                         # Check for alerts
-                        self.check_trial_alerts(trial_data)
+                        alert_data = self.check_trial_alerts(trial_data)
+                        if alert_data:
+                            alerts.append(alert_data)
                 
-                return {
-                    'statusCode': 200,
-                    'body': json.dumps({
-                        'message': f'Processed {len(studies)} clinical trials',
-                        'source': 'clinicaltrials'
-                    })
-                }
+                # Store in OpenSearch with one bulk request per index
+                self.opensearch.bulk_index('trials', trial_docs)
+                self.generate_alerts(alerts)
+                
+                return self._ok_response({
+                    'message': f'Processed {len(studies)} clinical trials',
+                    'source': 'clinicaltrials'
+                })
             
+            return self._error_response('ClinicalTrials.gov request failed', 502)
+        
         except Exception as e:
-            return {'statusCode': 500, 'body': json.dumps({'error': str(e)})}
+            return self._error_response(str(e))
     
     def ingest_fda_data(self) -> Dict[str, Any]:
         """Ingest FDA regulatory data"""
@@ -141,41 +216,37 @@ class DataIngestionHandler:
                 'limit': 20
             }
             
-            response = requests.get(base_url, params=params)
-            if response.status_code == 200:
-                data = response.json()
+            data = self._get_json(base_url, params)
+            if data is not None:
                 events = data.get('results', [])
                 
+                regulatory_docs = []
                 for event in events:
                     regulatory_data = self.process_fda_event(event)
                     if regulatory_data:
-                        # Store in OpenSearch
-                        self.opensearch.index_document(
-                            'regulatory',
-                            regulatory_data['id'],
-                            regulatory_data
-                        )
-                        
-                        # Generate alert if critical
-                        if regulatory_data.get('severity') == 'critical':
-                            self.generate_alert(regulatory_data)
+                        regulatory_docs.append(regulatory_data)
                 
-                return {
-                    'statusCode': 200,
-                    'body': json.dumps({
-                        'message': f'Processed {len(events)} FDA events',
-                        'source': 'fda'
-                    })
-                }
+                # Store in OpenSearch and generate alerts for critical events
+                self.opensearch.bulk_index('regulatory', regulatory_docs)
+                self.generate_alerts([doc for doc in regulatory_docs if doc.get('severity') == 'critical'])
+                
+                return self._ok_response({
+                    'message': f'Processed {len(events)} FDA events',
+                    'source': 'fda'
+                })
             
+            return self._error_response('FDA request failed', 502)
+        
         except Exception as e:
-            return {'statusCode': 500, 'body': json.dumps({'error': str(e)})}
+            return self._error_response(str(e))
     
-    def process_research_paper(self, paper_data: Dict[str, Any]) -> None:
-        """Process and store research paper data"""
+    def process_research_paper(self, paper_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Process research paper data into the document to store and index"""
         try:
             # Extract brand mentions and competitive intelligence
-            brands_mentioned = self.extract_brand_mentions(paper_data.get('abstract', ''))
+            brands_mentioned = self.extract_brand_mentions(
+                paper_data.get('title', '') + ' ' + paper_data.get('abstract', '')
+            )
             
             processed_data = {
                 'id': paper_data['pmid'],
@@ -186,15 +257,14 @@ class DataIngestionHandler:
                 'publishedDate': paper_data.get('published_date', ''),
                 'brandsmentioned': brands_mentioned,
                 'source': 'pubmed',
-                'processedAt': datetime.now().isoformat()
+                'processedAt': self._timestamp()
             }
             
-            # Store in S3 and index in OpenSearch
-            self.s3.store_metadata(f"papers/{paper_data['pmid']}.json", processed_data)
-            self.opensearch.index_document('papers', paper_data['pmid'], processed_data)
+            return processed_data
             
         except Exception as e:
             print(f"Error processing paper: {str(e)}")
+            return None
     
     def process_clinical_trial(self, study: Dict[str, Any]) -> Dict[str, Any]:
         """Process clinical trial data"""
@@ -209,7 +279,7 @@ class DataIngestionHandler:
                 'condition': study.get('Condition', [''])[0],
                 'sponsor': study.get('Sponsor', [''])[0],
                 'source': 'clinicaltrials.gov',
-                'processedAt': datetime.now().isoformat()
+                'processedAt': self._timestamp()
             }
         except Exception as e:
             print(f"Error processing trial: {str(e)}")
@@ -217,100 +287,172 @@ class DataIngestionHandler:
     
     def extract_brand_mentions(self, text: str) -> List[str]:
         """Extract pharmaceutical brand mentions from text"""
-        brands = [
-            'keytruda', 'pembrolizumab',
-            'opdivo', 'nivolumab',
-            'tecentriq', 'atezolizumab',
-            'imfinzi', 'durvalumab'
-        ]
-        
-        text_lower = text.lower()
-        mentioned_brands = [brand for brand in brands if brand in text_lower]
-        
-        return mentioned_brands
+        return list({match.group(0).lower() for match in _BRAND_PATTERN.finditer(text)})
     
-    def check_trial_alerts(self, trial_data: Dict[str, Any]) -> None:
-        """Check if trial data should generate alerts"""
+    def check_trial_alerts(self, trial_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Return an alert for the trial if it meets any alert condition"""
         try:
+            title = trial_data.get('title', '')
+            status = trial_data.get('status', '')
+            
+            # One brand scan serves both the alert condition and brandImpacted
+            brands = self.extract_brand_mentions(title)
+            
             # Alert conditions
-            alert_conditions = [
-                trial_data.get('phase') == 'Phase 3',
-                'completed' in trial_data.get('status', '').lower(),
-                any(brand in trial_data.get('title', '').lower() 
-                    for brand in ['pembrolizumab', 'nivolumab', 'atezolizumab'])
-            ]
+            if not (trial_data.get('phase') == 'Phase 3'
+                    or 'completed' in status.lower()
+                    or not ALERT_MOLECULES.isdisjoint(brands)):
+                return None
             
-            if any(alert_conditions):
-                alert_data = {
-                    'id': f"trial-alert-{trial_data['id']}",
-                    'title': f"Clinical Trial Update: {trial_data.get('title', '')}",
-                    'severity': 'medium',
-                    'source': 'Trials',
-                    'brandImpacted': self.extract_brand_mentions(trial_data.get('title', '')),
-                    'description': f"Trial {trial_data['id']} status: {trial_data.get('status', '')}",
-                    'whyItMatters': 'Clinical trial progression may impact competitive landscape',
-                    'createdAt': datetime.now().isoformat(),
-                    'confidenceScore': 85
-                }
-                
-                self.generate_alert(alert_data)
+            return {
+                'id': f"trial-alert-{trial_data['id']}",
+                'title': f"Clinical Trial Update: {title}",
+                'severity': 'medium',
+                'source': 'Trials',
+                'brandImpacted': brands,
+                'description': f"Trial {trial_data['id']} status: {status}",
+                'whyItMatters': 'Clinical trial progression may impact competitive landscape',
+                'createdAt': self._timestamp(),
+                'confidenceScore': 85
+            }
                 
         except Exception as e:
             print(f"Error checking trial alerts: {str(e)}")
+            return None
     
-    def generate_alert(self, alert_data: Dict[str, Any]) -> None:
-        """Generate and store alert"""
+    def generate_alerts(self, alerts: List[Dict[str, Any]]) -> None:
+        """Store alerts in one bulk request and notify on critical ones"""
+        if not alerts:
+            return
+        
         try:
-            # Store alert in OpenSearch
-            self.opensearch.index_document('alerts', alert_data['id'], alert_data)
+            # Store alerts in OpenSearch
+            self.opensearch.bulk_index('alerts', alerts)
             
-            # Send SNS notification for critical alerts
-            if alert_data.get('severity') == 'critical':
-                self.sns.publish(
+            # Send SNS notifications for critical alerts, up to ten per request
+            entries = [
+                {
+                    'Id': str(i),
+                    'Message': orjson.dumps(alert_data).decode(),
+                    'Subject': f"Critical Alert: {alert_data['title']}"
+                }
+                for i, alert_data in enumerate(alerts)
+                if alert_data.get('severity') == 'critical'
+            ]
+            for i in range(0, len(entries), SNS_BATCH_SIZE):
+                self.sns.publish_batch(
                     TopicArn=self.alert_topic,
-                    Message=json.dumps(alert_data),
-                    Subject=f"Critical Alert: {alert_data['title']}"
+                    PublishBatchRequestEntries=entries[i:i + SNS_BATCH_SIZE]
                 )
                 
         except Exception as e:
-            print(f"Error generating alert: {str(e)}")
+            print(f"Error generating alerts: {str(e)}")
     
-    def fetch_paper_details(self, pmid: str) -> Dict[str, Any]:
-        """Fetch detailed paper information from PubMed"""
+    def fetch_paper_details(self, pmids: List[str]) -> List[Dict[str, Any]]:
+        """Fetch paper summaries for a batch of PMIDs with one streamed ESummary call"""
+        url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esummary.fcgi"
+        params = {
+            'db': 'pubmed',
+            'id': ','.join(pmids)
+        }
+        if self.pubmed_api_key:
+            params['api_key'] = self.pubmed_api_key
+        
+        cache_key = self._cache_key(url, params)
+        cached = _RESPONSE_CACHE.get(cache_key)
+        if cached is not None:
+            return cached
+        
         try:
-            # Simplified - in production, use proper PubMed API
-            return {
-                'pmid': pmid,
-                'title': f'Research Paper {pmid}',
-                'abstract': 'Sample abstract mentioning pembrolizumab and competitive analysis',
-                'authors': ['Author 1', 'Author 2'],
-                'journal': 'Journal of Oncology',
-                'published_date': datetime.now().isoformat()
-            }
+            papers = []
+            with self.http.get(url, params=params, timeout=HTTP_TIMEOUT, stream=True) as response:
+                if response.status_code != 200:
+                    return []
+                
+                # Parse one DocSum at a time straight off the socket
+                response.raw.decode_content = True
+                for _, doc in etree.iterparse(response.raw, tag='DocSum'):
+                    # ESummary carries no abstract, so brand extraction relies on the title
+                    papers.append({
+                        'pmid': doc.findtext('Id', ''),
+                        'title': doc.findtext("Item[@Name='Title']", ''),
+                        'abstract': '',
+                        'authors': [author.text or '' for author in doc.iterfind("Item[@Name='AuthorList']/Item")],
+                        'journal': doc.findtext("Item[@Name='FullJournalName']", ''),
+                        'published_date': doc.findtext("Item[@Name='PubDate']", '')
+                    })
+                    
+                    # Drop parsed records so the tree never holds the whole response
+                    doc.clear()
+                    while doc.getprevious() is not None:
+                        del doc.getparent()[0]
+            
+            _RESPONSE_CACHE.set(cache_key, papers)
+            return papers
         except Exception as e:
             print(f"Error fetching paper details: {str(e)}")
-            return {}
+            return []
+    
+    def _timestamp(self) -> str:
+        """Invocation timestamp, or the current time when called outside lambda_handler"""
+        return self._now_iso or datetime.now().isoformat()
+    
+    def _cache_key(self, url: str, params: Dict[str, Any]) -> str:
+        """Stable response-cache key for a GET request"""
+        return hashlib.blake2b(
+            f"{url}?{urlencode(sorted(params.items()))}".encode('utf-8'), digest_size=16
+        ).hexdigest()
+    
+    def _get_json(self, url: str, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Cached GET returning the parsed JSON body, or None on failure"""
+        cache_key = self._cache_key(url, params)
+        cached = _RESPONSE_CACHE.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        try:
+            response = self.http.get(url, params=params, timeout=HTTP_TIMEOUT)
+            if response.status_code == 200:
+                data = orjson.loads(response.content)
+                _RESPONSE_CACHE.set(cache_key, data)
+                return data
+            return None
+        except Exception as e:
+            print(f"Error fetching {url}: {str(e)}")
+            return None
+    
+    def _run_concurrently(self, fn, items: List, max_workers: int = FETCH_WORKERS) -> List:
+        """Run an I/O-bound call over items in a thread pool, preserving order"""
+        if not items:
+            return []
+        
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as executor:
+            return list(executor.map(fn, items))
     
     def run_scheduled_ingestion(self) -> Dict[str, Any]:
         """Run all scheduled data ingestion tasks"""
         results = []
         
-        # Run each ingestion source
-        sources = ['pubmed', 'clinicaltrials', 'fda']
+        # Sources share no data, so run them side by side
+        sources = {
+            'pubmed': self.ingest_pubmed_data,
+            'clinicaltrials': self.ingest_clinical_trials,
+            'fda': self.ingest_fda_data
+        }
+        
+        with ThreadPoolExecutor(max_workers=len(sources)) as executor:
+            futures = {
+                source: executor.submit(ingest)
+                for source, ingest in sources.items()
+            }
         
-        for source in sources:
+        for source, future in futures.items():
             try:
-                if source == 'pubmed':
-                    result = self.ingest_pubmed_data()
-                elif source == 'clinicaltrials':
-                    result = self.ingest_clinical_trials()
-                elif source == 'fda':
-                    result = self.ingest_fda_data()
-                
+                result = future.result()
                 results.append({
                     'source': source,
                     'status': 'success' if result['statusCode'] == 200 else 'error',
-                    'message': json.loads(result['body']).get('message', '')
+                    'message': orjson.loads(result['body']).get('message', '')
                 })
             except Exception as e:
                 results.append({
@@ -319,15 +461,21 @@ class DataIngestionHandler:
                     'message': str(e)
                 })
         
-        return {
-            'statusCode': 200,
-            'body': json.dumps({
-                'message': 'Scheduled ingestion completed',
-                'results': results
-            })
-        }
+        return self._ok_response({
+            'message': 'Scheduled ingestion completed',
+            'results': results
+        })
+    
+    def _ok_response(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        """Return a 200 response with a JSON body"""
+        return {'statusCode': 200, 'body': orjson.dumps(body).decode()}
+    
+    def _error_response(self, message: str, status_code: int = 500) -> Dict[str, Any]:
+        """Return an error response with a JSON body"""
+        return {'statusCode': status_code, 'body': orjson.dumps({'error': message}).decode()}
 
 # Lambda entry point
 def lambda_handler(event, context):
-    handler = DataIngestionHandler()
-    return handler.lambda_handler(event, context)
\ No newline at end of file
+    global _HANDLER
+    _HANDLER = _HANDLER or DataIngestionHandler()
+    return _HANDLER.lambda_handler(event, context)
\ No newline at end of file
@@ -1,19 +1,85 @@
-import json
+import hashlib
+import orjson
 import os
+import re
 import boto3
+from botocore.config import Config
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Dict, Any, List, Optional
 from services.opensearch_service import OpenSearchService
 from services.s3_service import S3Service
 
+# Concurrent Bedrock validations, kept under the model's TPS quota
+VALIDATION_WORKERS = 16
+
+# Documents validated per Bedrock prompt
+VALIDATION_BATCH_SIZE = 15
+
+# Cardinality is near-exact up to this many distinct keys; beyond it duplicates are counted from terms buckets
+CARDINALITY_PRECISION = 40000
+DUPLICATE_BUCKETS = 10000
+
+# Bedrock verdicts are kept per document content, so unchanged samples are not revalidated
+VERDICT_CACHE_INDEX = 'quality_cache'
+VERDICT_TTL = timedelta(days=30)
+
+# Model verdicts; any other reply means no verdict was obtained
+_VERDICTS = {'ACCURATE': True, 'INACCURATE': False}
+_VERDICT_PATTERN = re.compile(r'\b(INACCURATE|ACCURATE)\b')
+
+# Required fields for each data type
+REQUIRED_FIELDS = {
+    'papers': ['id', 'title', 'abstract', 'publishedDate', 'source'],
+    'trials': ['id', 'title', 'phase', 'status', 'sponsor'],
+    'regulatory': ['id', 'dataType', 'brand', 'source'],
+    'patents': ['id', 'title', 'assignee', 'filingDate'],
+    'alerts': ['id', 'title', 'severity', 'source', 'createdAt']
+}
+
+def _present(field: str) -> Dict[str, Any]:
+    """Filter for documents with a non-empty value; ingestion writes '' for missing strings"""
+    return {
+        'bool': {
+            'filter': [{'exists': {'field': field}}],
+            'must_not': [{'term': {f'{field}.keyword': ''}}]
+        }
+    }
+
+# Completeness searches are fixed, so build the presence filters once per container
+_COMPLETENESS_SEARCHES = [
+    (index, {
+        'size': 0,
+        'track_total_hits': True,
+        'aggs': {
+            'complete': {
+                'filter': {'bool': {'filter': [_present(field) for field in fields]}}
+            },
+            'fields': {
+                'filters': {'filters': {field: _present(field) for field in fields}}
+            }
+        }
+    })
+    for index, fields in REQUIRED_FIELDS.items()
+]
+
+# Reused across warm invocations so clients and HTTP pools are built once per container
+_PIPELINE = None
+
 class DataQualityPipeline:
     def __init__(self):
         self.opensearch = OpenSearchService()
         self.s3 = S3Service()
         self.sns = boto3.client('sns')
-        self.bedrock = boto3.client('bedrock-runtime')
+        self.bedrock = boto3.client('bedrock-runtime', config=Config(max_pool_connections=VALIDATION_WORKERS))
         self.alert_topic = os.environ.get('ALERT_TOPIC', '')
         
+        # Set once per invocation so every report and alert in a run shares one timestamp
+        self._now = None
+        
+        # Reports and alerts indexed in one bulk request at the end of each invocation
+        self._pending_index = []
+        
         # Data quality thresholds
         self.quality_thresholds = {
             'completeness': 0.85,  # 85% of required fields must be present
@@ -22,72 +88,72 @@ class DataQualityPipeline:
             'consistency': 0.95,   # 95% consistency across sources
             'uniqueness': 0.98     # 98% unique records (2% duplication allowed)
         }
-
+        
+        # Individual checks, in the order the comprehensive report lists them
+        self.quality_checks = {
+            'completeness': self.check_data_completeness,
+            'accuracy': self.check_data_accuracy,
+            'timeliness': self.check_data_timeliness,
+            'uniqueness': self.check_data_uniqueness
+        }
+        self.check_handlers = {
+            **self.quality_checks,
+            'comprehensive': self.run_comprehensive_quality_check
+        }
+    
     def lambda_handler(self, event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         """Main data quality pipeline handler"""
         try:
+            self._now = datetime.now()
             check_type = event.get('check_type', 'comprehensive')
             
-            if check_type == 'completeness':
-                return self.check_data_completeness()
-            elif check_type == 'accuracy':
-                return self.check_data_accuracy()
-            elif check_type == 'timeliness':
-                return self.check_data_timeliness()
-            elif check_type == 'consistency':
-                return self.check_data_consistency()
-            elif check_type == 'uniqueness':
-                return self.check_data_uniqueness()
-            elif check_type == 'comprehensive':
-                return self.run_comprehensive_quality_check()
-            else:
-                return self.validate_specific_dataset(event.get('dataset', ''))
+            handler = self.check_handlers.get(check_type)
+            if handler:
+                return handler()
+            
+            # 'consistency' used to route to a check_data_consistency method that was never implemented
+            if check_type == 'consistency':
+                return {
+                    'statusCode': 400,
+                    'body': orjson.dumps({
+                        'error': "The 'consistency' check is not implemented",
+                        'supported_check_types': list(self.check_handlers)
+                    }).decode()
+                }
+            return self.validate_specific_dataset(event.get('dataset', ''))
                 
         except Exception as e:
             print(f"Data quality check error: {str(e)}")
-            return {'statusCode': 500, 'body': json.dumps({'error': str(e)})}
-
+            return {'statusCode': 500, 'body': orjson.dumps({'error': str(e)}).decode()}
+            
+        finally:
+            self.flush_pending_index()
+    
     def check_data_completeness(self) -> Dict[str, Any]:
         """Check data completeness across all sources"""
         try:
             completeness_results = {}
             
-            # Define required fields for each data type
-            required_fields = {
-                'papers': ['id', 'title', 'abstract', 'publishedDate', 'source'],
-                'trials': ['id', 'title', 'phase', 'status', 'sponsor'],
-                'regulatory': ['id', 'dataType', 'brand', 'source'],
-                'patents': ['id', 'title', 'assignee', 'filingDate'],
-                'alerts': ['id', 'title', 'severity', 'source', 'createdAt']
-            }
+            # Count complete documents and per-field coverage server-side, all indices in one _msearch
+            responses = self.opensearch.msearch(_COMPLETENESS_SEARCHES, filter_path='hits.total,aggregations')
             
-            for index, fields in required_fields.items():
-                # Query OpenSearch for documents with missing fields
-                query = {
-                    'query': {'match_all': {}},
-                    'size': 1000,
-                    '_source': fields
-                }
+            for (index, fields), results in zip(REQUIRED_FIELDS.items(), responses):
+                total_docs = results.get('hits', {}).get('total', {}).get('value', 0)
                 
-                results = self.opensearch.search(index, query)
-                documents = results.get('hits', {}).get('hits', [])
-                
-                if documents:
-                    complete_docs = 0
-                    total_docs = len(documents)
-                    
-                    for doc in documents:
-                        source_data = doc.get('_source', {})
-                        missing_fields = [field for field in fields if not source_data.get(field)]
-                        
-                        if not missing_fields:
-                            complete_docs += 1
+                if total_docs:
+                    aggregations = results.get('aggregations', {})
+                    complete_docs = aggregations.get('complete', {}).get('doc_count', 0)
+                    field_buckets = aggregations.get('fields', {}).get('buckets', {})
                     
-                    completeness_score = complete_docs / total_docs if total_docs > 0 else 0
+                    completeness_score = complete_docs / total_docs
                     
                     completeness_results[index] = {
                         'total_documents': total_docs,
                         'complete_documents': complete_docs,
+                        'missing_fields': {
+                            field: total_docs - field_buckets.get(field, {}).get('doc_count', 0)
+                            for field in fields
+                        },
                         'completeness_score': completeness_score,
                         'meets_threshold': completeness_score >= self.quality_thresholds['completeness']
                     }
@@ -100,7 +166,7 @@ class DataQualityPipeline:
                 'overall_score': overall_completeness,
                 'meets_threshold': overall_completeness >= self.quality_thresholds['completeness'],
                 'details': completeness_results,
-                'timestamp': datetime.now().isoformat()
+                'timestamp': self._current_time().isoformat()
             }
             
             # Store quality report
@@ -112,16 +178,16 @@ class DataQualityPipeline:
             
             return {
                 'statusCode': 200,
-                'body': json.dumps({
+                'body': orjson.dumps({
                     'message': 'Data completeness check completed',
                     'overall_score': overall_completeness,
                     'meets_threshold': quality_report['meets_threshold']
-                })
+                }).decode()
             }
             
         except Exception as e:
-            return {'statusCode': 500, 'body': json.dumps({'error': str(e)})}
-
+            return {'statusCode': 500, 'body': orjson.dumps({'error': str(e)}).decode()}
+    
     def check_data_accuracy(self) -> Dict[str, Any]:
         """Check data accuracy using AI validation"""
         try:
@@ -130,44 +196,89 @@ class DataQualityPipeline:
             # Sample documents for accuracy validation
             indices = ['papers', 'trials', 'regulatory']
             
-            for index in indices:
-                # Get sample of recent documents
-                query = {
-                    'query': {
-                        'range': {
-                            'processedAt': {
-                                'gte': 'now-7d'
-                            }
+            # Get sample of recent documents from every index in one _msearch
+            query = {
+                'query': {
+                    'range': {
+                        'processedAt': {
+                            'gte': 'now-7d'
                         }
-                    },
-                    'size': 50,
-                    'sort': [{'processedAt': {'order': 'desc'}}]
-                }
-                
-                results = self.opensearch.search(index, query)
-                documents = results.get('hits', {}).get('hits', [])
-                
-                if documents:
-                    accurate_docs = 0
-                    total_docs = len(documents)
+                    }
+                },
+                'size': 50,
+                'sort': [{'processedAt': {'order': 'desc'}}]
+            }
+            samples = self.opensearch.msearch([(index, query) for index in indices], filter_path='hits.hits._source')
+            
+            # Reuse verdicts for documents validated unchanged in earlier runs
+            verdict_cutoff = (self._current_time() - VERDICT_TTL).isoformat()
+            sampled = {}
+            
+            # Bedrock calls are network-bound; submit every index's batches before collecting any
+            with ThreadPoolExecutor(max_workers=VALIDATION_WORKERS) as executor:
+                for index, results in zip(indices, samples):
+                    documents = [hit.get('_source', {}) for hit in results.get('hits', {}).get('hits', [])]
                     
-                    for doc in documents:
-                        source_data = doc.get('_source', {})
+                    if documents:
+                        keys = [self._verdict_key(document, index) for document in documents]
+                        verdicts = {
+                            key: cached['accurate']
+                            for key, cached in self.opensearch.mget(VERDICT_CACHE_INDEX, keys).items()
+                            if cached.get('validatedAt', '') >= verdict_cutoff
+                        }
+                        pending = list({key: document for key, document in zip(keys, documents) if key not in verdicts}.items())
                         
                         # AI-powered accuracy validation
-                        is_accurate = self.validate_document_accuracy(source_data, index)
-                        if is_accurate:
-                            accurate_docs += 1
+                        batches = [
+                            pending[i:i + VALIDATION_BATCH_SIZE]
+                            for i in range(0, len(pending), VALIDATION_BATCH_SIZE)
+                        ]
+                        submitted = [
+                            (batch, executor.submit(self.validate_documents_accuracy, [document for _, document in batch], index))
+                            for batch in batches
+                        ]
+                        sampled[index] = (keys, verdicts, submitted)
+                
+                for index, (keys, verdicts, submitted) in sampled.items():
+                    for batch, future in submitted:
+                        for (key, _), accurate in zip(batch, future.result()):
+                            verdicts[key] = accurate
+                            
+                            # Only real model verdicts are cached; failed validations are retried next run
+                            if accurate is None:
+                                continue
+                            self._pending_index.append({
+                                '_op_type': 'index',
+                                '_index': VERDICT_CACHE_INDEX,
+                                '_id': key,
+                                '_source': {
+                                    'docType': index,
+                                    'accurate': accurate,
+                                    'validatedAt': self._current_time().isoformat()
+                                }
+                            })
                     
-                    accuracy_score = accurate_docs / total_docs if total_docs > 0 else 0
+                    # Documents without a verdict count neither as accurate nor towards the total
+                    validated = [verdicts[key] for key in keys if verdicts[key] is not None]
+                    if not validated:
+                        continue
+                    
+                    total_docs = len(validated)
+                    accurate_docs = sum(validated)
+                    
+                    accuracy_score = accurate_docs / total_docs
                     
                     accuracy_results[index] = {
                         'total_documents': total_docs,
                         'accurate_documents': accurate_docs,
+                        'unvalidated_documents': len(keys) - total_docs,
                         'accuracy_score': accuracy_score,
                         'meets_threshold': accuracy_score >= self.quality_thresholds['accuracy']
                     }
             
+            if not accuracy_results:
+                return {'statusCode': 502, 'body': orjson.dumps({'error': 'No accuracy verdicts could be obtained'}).decode()}
+            
             overall_accuracy = sum(r['accuracy_score'] for r in accuracy_results.values()) / len(accuracy_results)
             
             quality_report = {
@@ -175,7 +286,7 @@ class DataQualityPipeline:
                 'overall_score': overall_accuracy,
                 'meets_threshold': overall_accuracy >= self.quality_thresholds['accuracy'],
                 'details': accuracy_results,
-                'timestamp': datetime.now().isoformat()
+                'timestamp': self._current_time().isoformat()
             }
             
             self.store_quality_report(quality_report)
@@ -185,40 +296,47 @@ class DataQualityPipeline:
             
             return {
                 'statusCode': 200,
-                'body': json.dumps({
+                'body': orjson.dumps({
                     'message': 'Data accuracy check completed',
                     'overall_score': overall_accuracy,
                     'meets_threshold': quality_report['meets_threshold']
-                })
+                }).decode()
             }
             
         except Exception as e:
-            return {'statusCode': 500, 'body': json.dumps({'error': str(e)})}
-
+            return {'statusCode': 500, 'body': orjson.dumps({'error': str(e)}).decode()}
+    
     def check_data_timeliness(self) -> Dict[str, Any]:
         """Check data timeliness"""
         try:
             timeliness_results = {}
-            cutoff_time = datetime.now() - timedelta(hours=self.quality_thresholds['timeliness'])
+            cutoff_time = self._current_time() - timedelta(hours=self.quality_thresholds['timeliness'])
             
             indices = ['papers', 'trials', 'regulatory', 'alerts']
             
-            for index in indices:
-                # Count recent vs old documents
-                recent_query = {
-                    'query': {
-                        'range': {
-                            'processedAt': {
-                                'gte': cutoff_time.isoformat()
-                            }
+            # Count recent vs old documents: one total and one recent count per index, all in one _msearch
+            recent_query = {
+                'size': 0,
+                'track_total_hits': True,
+                'query': {
+                    'range': {
+                        'processedAt': {
+                            'gte': cutoff_time.isoformat()
                         }
                     }
                 }
-                
-                total_query = {'query': {'match_all': {}}}
-                
-                recent_count = self.opensearch.count_documents(index, recent_query.get('query'))
-                total_count = self.opensearch.count_documents(index)
+            }
+            total_query = {'size': 0, 'track_total_hits': True, 'query': {'match_all': {}}}
+            
+            searches = []
+            for index in indices:
+                searches.append((index, recent_query))
+                searches.append((index, total_query))
+            responses = self.opensearch.msearch(searches, filter_path='hits.total')
+            
+            for i, index in enumerate(indices):
+                recent_count = responses[2 * i].get('hits', {}).get('total', {}).get('value', 0)
+                total_count = responses[2 * i + 1].get('hits', {}).get('total', {}).get('value', 0)
                 
                 timeliness_score = recent_count / total_count if total_count > 0 else 0
                 
@@ -236,23 +354,23 @@ class DataQualityPipeline:
                 'overall_score': overall_timeliness,
                 'meets_threshold': overall_timeliness >= 0.7,
                 'details': timeliness_results,
-                'timestamp': datetime.now().isoformat()
+                'timestamp': self._current_time().isoformat()
             }
             
             self.store_quality_report(quality_report)
             
             return {
                 'statusCode': 200,
-                'body': json.dumps({
+                'body': orjson.dumps({
                     'message': 'Data timeliness check completed',
                     'overall_score': overall_timeliness,
                     'meets_threshold': quality_report['meets_threshold']
-                })
+                }).decode()
             }
             
         except Exception as e:
-            return {'statusCode': 500, 'body': json.dumps({'error': str(e)})}
-
+            return {'statusCode': 500, 'body': orjson.dumps({'error': str(e)}).decode()}
+    
     def check_data_uniqueness(self) -> Dict[str, Any]:
         """Check for duplicate records"""
         try:
@@ -260,59 +378,85 @@ class DataQualityPipeline:
             
             indices = ['papers', 'trials', 'regulatory']
             
-            for index in indices:
-                # Find duplicates based on key fields
-                if index == 'papers':
-                    duplicate_query = {
-                        'aggs': {
-                            'duplicates': {
-                                'terms': {
-                                    'field': 'title.keyword',
-                                    'min_doc_count': 2,
-                                    'size': 1000
-                                }
-                            }
-                        },
-                        'size': 0
-                    }
-                elif index == 'trials':
-                    duplicate_query = {
-                        'aggs': {
-                            'duplicates': {
-                                'terms': {
-                                    'field': 'id.keyword',
-                                    'min_doc_count': 2,
-                                    'size': 1000
-                                }
+            # Find duplicates based on key fields
+            duplicate_fields = {
+                'papers': 'title.keyword',
+                'trials': 'id.keyword',
+                'regulatory': 'id.keyword'
+            }
+            
+            # Keyed and distinct key counts come back with the total, all indices in one _msearch;
+            # both aggregations read the same keyword field, so documents without a key are never duplicates
+            searches = [
+                (index, {
+                    'aggs': {
+                        'keyed': {'value_count': {'field': duplicate_fields[index]}},
+                        'unique': {
+                            'cardinality': {
+                                'field': duplicate_fields[index],
+                                'precision_threshold': CARDINALITY_PRECISION
                             }
-                        },
-                        'size': 0
-                    }
-                else:
-                    duplicate_query = {
+                        }
+                    },
+                    'size': 0,
+                    'track_total_hits': True
+                })
+                for index in indices
+            ]
+            
+            responses = self.opensearch.msearch(
+                searches,
+                filter_path='hits.total,aggregations.keyed.value,aggregations.unique.value'
+            )
+            
+            counts = {}
+            for index, results in zip(indices, responses):
+                aggregations = results.get('aggregations', {})
+                keyed_count = aggregations.get('keyed', {}).get('value', 0)
+                unique_count = aggregations.get('unique', {}).get('value', keyed_count)
+                counts[index] = {
+                    'total': results.get('hits', {}).get('total', {}).get('value', 0),
+                    'keyed': keyed_count,
+                    'duplicates': max(keyed_count - unique_count, 0)  # Every document beyond the first per key
+                }
+            
+            # Past the precision threshold the cardinality estimate drifts by about as much as the
+            # threshold allows, so count the extras per duplicated key exactly instead
+            estimated = [index for index in indices if counts[index]['keyed'] > CARDINALITY_PRECISION]
+            if estimated:
+                duplicate_searches = [
+                    (index, {
                         'aggs': {
                             'duplicates': {
                                 'terms': {
-                                    'field': 'id.keyword',
+                                    'field': duplicate_fields[index],
                                     'min_doc_count': 2,
-                                    'size': 1000
+                                    'size': DUPLICATE_BUCKETS
                                 }
                             }
                         },
                         'size': 0
-                    }
-                
-                results = self.opensearch.search(index, duplicate_query)
-                duplicates = results.get('aggregations', {}).get('duplicates', {}).get('buckets', [])
-                
-                total_count = self.opensearch.count_documents(index)
-                duplicate_count = sum(bucket['doc_count'] - 1 for bucket in duplicates)  # Subtract 1 to count only extras
+                    })
+                    for index in estimated
+                ]
+                duplicate_responses = self.opensearch.msearch(
+                    duplicate_searches,
+                    filter_path='aggregations.duplicates.buckets.doc_count'
+                )
+                for index, results in zip(estimated, duplicate_responses):
+                    buckets = results.get('aggregations', {}).get('duplicates', {}).get('buckets', [])
+                    counts[index]['duplicates'] = sum(bucket['doc_count'] - 1 for bucket in buckets)
+            
+            for index in indices:
+                total_count = counts[index]['total']
+                duplicate_count = counts[index]['duplicates']
                 
                 uniqueness_score = (total_count - duplicate_count) / total_count if total_count > 0 else 1
                 
                 uniqueness_results[index] = {
                     'total_documents': total_count,
                     'duplicate_documents': duplicate_count,
+                    'missing_key_documents': total_count - counts[index]['keyed'],
                     'uniqueness_score': uniqueness_score,
                     'meets_threshold': uniqueness_score >= self.quality_thresholds['uniqueness']
                 }
@@ -324,31 +468,85 @@ class DataQualityPipeline:
                 'overall_score': overall_uniqueness,
                 'meets_threshold': overall_uniqueness >= self.quality_thresholds['uniqueness'],
                 'details': uniqueness_results,
-                'timestamp': datetime.now().isoformat()
+                'timestamp': self._current_time().isoformat()
             }
             
             self.store_quality_report(quality_report)
             
             return {
                 'statusCode': 200,
-                'body': json.dumps({
+                'body': orjson.dumps({
                     'message': 'Data uniqueness check completed',
                     'overall_score': overall_uniqueness,
                     'meets_threshold': quality_report['meets_threshold']
+                }).decode()
+            }
+            
+        except Exception as e:
+            return {'statusCode': 500, 'body': orjson.dumps({'error': str(e)}).decode()}
+    
+    def validate_documents_accuracy(self, documents: List[Dict[str, Any]], doc_type: str) -> List[Optional[bool]]:
+        """AI-powered accuracy validation of a batch of documents in one prompt; returns one verdict per document, None where none was obtained"""
+        try:
+            listing = '\n'.join(
+                f"Document {i}: {orjson.dumps(document, default=str).decode()[:1000]}"
+                for i, document in enumerate(documents)
+            )
+            prompt = f"""
+            Validate the accuracy of each of these {doc_type} documents:
+            
+            {listing}
+            
+            Check for:
+            1. Logical consistency
+            2. Proper brand name mentions
+            3. Valid dates and formats
+            4. Reasonable data values
+            
+            Respond with only a JSON array, one entry per document, no other text:
+            [{{"id": <document number>, "verdict": "ACCURATE" or "INACCURATE"}}]
+            """
+            
+            response = self.bedrock.invoke_model(
+                modelId='anthropic.claude-3-sonnet-20240229-v1:0',
+                body=orjson.dumps({
+                    'anthropic_version': 'bedrock-2023-05-31',
+                    'max_tokens': len(documents) * 40,
+                    'messages': [{'role': 'user', 'content': prompt}]
                 })
+            )
+            
+            response_body = orjson.loads(response['body'].read())
+            validation_result = response_body['content'][0]['text']
+            
+            # Tolerate stray prose around the requested JSON array
+            verdicts = {
+                int(entry['id']): str(entry['verdict']).strip().upper()
+                for entry in orjson.loads(validation_result[validation_result.find('['):validation_result.rfind(']') + 1])
             }
+            if set(verdicts) != set(range(len(documents))):
+                raise ValueError(f"expected {len(documents)} verdicts, got {len(verdicts)}")
+            
+            return [_VERDICTS.get(verdicts[i]) for i in range(len(documents))]
             
         except Exception as e:
-            return {'statusCode': 500, 'body': json.dumps({'error': str(e)})}
-
-    def validate_document_accuracy(self, document: Dict[str, Any], doc_type: str) -> bool:
-        """AI-powered document accuracy validation"""
+            print(f"Batch accuracy validation failed, validating individually: {str(e)}")
+            return [self.validate_document_accuracy(document, doc_type) for document in documents]
+    
+    @staticmethod
+    def _verdict_key(document: Dict[str, Any], doc_type: str) -> str:
+        """Stable verdict-cache key for a document's content"""
+        content = orjson.dumps(document, default=str, option=orjson.OPT_SORT_KEYS)
+        return hashlib.blake2b(doc_type.encode('utf-8') + b'\0' + content, digest_size=16).hexdigest()
+    
+    def validate_document_accuracy(self, document: Dict[str, Any], doc_type: str) -> Optional[bool]:
+        """AI-powered document accuracy validation; None when no verdict was obtained"""
         try:
             # Use Bedrock for accuracy validation
             prompt = f"""
             Validate the accuracy of this {doc_type} document:
             
-            Document: {json.dumps(document, indent=2)[:1000]}
+            Document: {orjson.dumps(document, default=str).decode()[:1000]}
             
             Check for:
             1. Logical consistency
@@ -361,87 +559,102 @@ class DataQualityPipeline:
             
             response = self.bedrock.invoke_model(
                 modelId='anthropic.claude-3-sonnet-20240229-v1:0',
-                body=json.dumps({
+                body=orjson.dumps({
                     'anthropic_version': 'bedrock-2023-05-31',
                     'max_tokens': 100,
                     'messages': [{'role': 'user', 'content': prompt}]
                 })
             )
             
-            response_body = json.loads(response['body'].read())
+            response_body = orjson.loads(response['body'].read())
             validation_result = response_body['content'][0]['text']
             
-            return 'ACCURATE' in validation_result.upper()
+            match = _VERDICT_PATTERN.search(validation_result.upper())
+            return _VERDICTS[match.group(1)] if match else None
             
         except Exception as e:
             print(f"Error in accuracy validation: {str(e)}")
-            return True  # Default to accurate if validation fails
-
+            return None
+    
+    def _current_time(self) -> datetime:
+        """Invocation time, or the current time when called outside lambda_handler"""
+        return self._now or datetime.now()
+    
     def store_quality_report(self, report: Dict[str, Any]) -> None:
         """Store quality report in S3 and OpenSearch"""
         try:
-            report_id = f"quality-report-{report['check_type']}-{int(datetime.now().timestamp())}"
+            report_id = f"quality-report-{report['check_type']}-{int(self._current_time().timestamp())}"
             
             # Store in S3
             self.s3.store_metadata(f"quality-reports/{report_id}.json", report)
             
-            # Index in OpenSearch
-            self.opensearch.index_document('quality_reports', report_id, report)
+            # Index in OpenSearch with the rest of this invocation's reports and alerts
+            self._pending_index.append({
+                '_op_type': 'index',
+                '_index': 'quality_reports',
+                '_id': report_id,
+                '_routing': report['check_type'],
+                '_source': report
+            })
             
         except Exception as e:
             print(f"Error storing quality report: {str(e)}")
-
+    
+    def flush_pending_index(self) -> None:
+        """Bulk-index the reports and alerts buffered during this invocation"""
+        pending, self._pending_index = self._pending_index, []
+        self.opensearch.bulk(pending)
+    
     def generate_quality_alert(self, report: Dict[str, Any]) -> None:
         """Generate alert for quality issues"""
         try:
             alert_data = {
-                'id': f"quality-alert-{report['check_type']}-{int(datetime.now().timestamp())}",
+                'id': f"quality-alert-{report['check_type']}-{int(self._current_time().timestamp())}",
                 'title': f"Data Quality Issue: {report['check_type'].title()}",
                 'severity': 'high' if report['overall_score'] < 0.7 else 'medium',
                 'source': 'Data Quality Pipeline',
                 'brandImpacted': ['All'],
                 'description': f"Data quality check for {report['check_type']} failed with score {report['overall_score']:.2f}",
                 'whyItMatters': 'Poor data quality can lead to incorrect competitive intelligence and business decisions',
-                'createdAt': datetime.now().isoformat(),
+                'createdAt': self._current_time().isoformat(),
                 'confidenceScore': 95,
                 'qualityReport': report
             }
             
-            # Store alert
-            self.opensearch.index_document('alerts', alert_data['id'], alert_data)
+            # Store alert with the rest of this invocation's reports and alerts
+            self._pending_index.append({
+                '_op_type': 'index',
+                '_index': 'alerts',
+                '_id': alert_data['id'],
+                '_source': alert_data
+            })
             
             # Send SNS notification
             self.sns.publish(
                 TopicArn=self.alert_topic,
-                Message=json.dumps(alert_data),
+                Message=orjson.dumps(alert_data).decode(),
                 Subject=f"Data Quality Alert: {report['check_type'].title()}"
             )
             
         except Exception as e:
             print(f"Error generating quality alert: {str(e)}")
-
+    
     def run_comprehensive_quality_check(self) -> Dict[str, Any]:
         """Run all quality checks"""
         try:
             results = {}
             
-            # Run all quality checks
-            checks = ['completeness', 'accuracy', 'timeliness', 'uniqueness']
+            # Run all quality checks; they share no data, so run them side by side
+            with ThreadPoolExecutor(max_workers=len(self.quality_checks)) as executor:
+                futures = {check: executor.submit(run_check) for check, run_check in self.quality_checks.items()}
             
-            for check in checks:
+            for check, future in futures.items():
                 try:
-                    if check == 'completeness':
-                        result = self.check_data_completeness()
-                    elif check == 'accuracy':
-                        result = self.check_data_accuracy()
-                    elif check == 'timeliness':
-                        result = self.check_data_timeliness()
-                    elif check == 'uniqueness':
-                        result = self.check_data_uniqueness()
+                    result = future.result()
                     
                     results[check] = {
                         'status': 'success' if result['statusCode'] == 200 else 'error',
-                        'result': json.loads(result['body'])
+                        'result': orjson.loads(result['body'])
                     }
                     
                 except Exception as e:
@@ -461,24 +674,25 @@ class DataQualityPipeline:
                 'check_type': 'comprehensive',
                 'overall_quality_score': overall_score,
                 'individual_checks': results,
-                'timestamp': datetime.now().isoformat()
+                'timestamp': self._current_time().isoformat()
             }
             
             self.store_quality_report(comprehensive_report)
             
             return {
                 'statusCode': 200,
-                'body': json.dumps({
+                'body': orjson.dumps({
                     'message': 'Comprehensive quality check completed',
                     'overall_score': overall_score,
                     'checks_completed': len(results)
-                })
+                }).decode()
             }
             
         except Exception as e:
-            return {'statusCode': 500, 'body': json.dumps({'error': str(e)})}
+            return {'statusCode': 500, 'body': orjson.dumps({'error': str(e)}).decode()}
 
 # Lambda entry point
 def lambda_handler(event, context):
-    pipeline = DataQualityPipeline()
-    return pipeline.lambda_handler(event, context)
\ No newline at end of file
+    global _PIPELINE
+    _PIPELINE = _PIPELINE or DataQualityPipeline()
+    return _PIPELINE.lambda_handler(event, context)
\ No newline at end of file
@@ -1,30 +1,92 @@
-import json
+import orjson
 import os
+import re
+import uuid
 import boto3
-from typing import Dict, Any
+from botocore.config import Config
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List
 from datetime import datetime
 from services.opensearch_service import OpenSearchService
 from services.s3_service import S3Service
 
+# S3 records processed at once; each one waits on an S3 GET and a Bedrock call
+RECORD_WORKERS = 32
+
+# Brands and molecules recognized in AI analyses
+TARGET_BRANDS = (
+    'keytruda', 'pembrolizumab',
+    'opdivo', 'nivolumab',
+    'tecentriq', 'atezolizumab',
+    'imfinzi', 'durvalumab'
+)
+
+# One pass over the text finds every brand, instead of one substring scan per brand
+_BRAND_PATTERN = re.compile(r'\b(?:' + '|'.join(TARGET_BRANDS) + r')\b', re.IGNORECASE)
+
+# Markers that classify a document, found together in a single scan
+_DOC_TYPE_PATTERN = re.compile('fda|regulatory|patent|news|article', re.IGNORECASE)
+
+# Score and keyword patterns, matched against lowercased analysis text
+_THREAT_LEVEL_PATTERN = re.compile(r'threat level[:\s]*(\d+)')
+_IMPACT_SCORE_PATTERN = re.compile(r'impact score[:\s]*(\d+)')
+_HIGH_THREAT_PATTERN = re.compile('critical|major|significant|breakthrough')
+_MEDIUM_THREAT_PATTERN = re.compile('moderate|notable|important')
+_HIGH_URGENCY_PATTERN = re.compile('urgent|immediate|critical')
+_MEDIUM_URGENCY_PATTERN = re.compile('moderate|medium')
+
+# Reused across warm invocations so clients and HTTP pools are built once per container
+_PROCESSOR = None
+
+# Invariant instructions lead each analysis prompt; only the document fields after them vary
+TRIAL_ANALYSIS_INSTRUCTIONS = """
+Analyze this clinical trial data for competitive intelligence.
+
+Provide:
+1. Competitive threat level (1-10)
+2. Key brands impacted
+3. Strategic implications
+4. Risk assessment
+"""
+
+REGULATORY_ANALYSIS_INSTRUCTIONS = """
+Analyze this regulatory document for pharmaceutical competitive intelligence.
+
+Determine:
+1. Regulatory impact score (1-10)
+2. Affected pharmaceutical brands
+3. Market implications
+4. Urgency level for competitive response
+"""
+
 class DocumentProcessor:
     def __init__(self):
         self.opensearch = OpenSearchService()
         self.s3 = S3Service()
-        self.bedrock = boto3.client('bedrock-runtime')
+        self.bedrock = boto3.client('bedrock-runtime', config=Config(
+            max_pool_connections=RECORD_WORKERS,
+            tcp_keepalive=True,
+            retries={'max_attempts': 3, 'mode': 'adaptive'}
+        ))
         self.sns = boto3.client('sns')
         self.alert_topic = os.environ.get('ALERT_TOPIC', '')
+        
+        # Set once per invocation so every document and alert in a run shares one timestamp
+        self._now = None
+        
+        # Documents and alerts indexed in one bulk request at the end of each invocation
+        self._pending_index = []
     
     def lambda_handler(self, event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         """Process documents uploaded to S3"""
         try:
+            self._now = datetime.now()
+            
             # Handle S3 event
             if 'Records' in event:
-                for record in event['Records']:
-                    if record.get('eventSource') == 'aws:s3':
-                        bucket = record['s3']['bucket']['name']
-                        key = record['s3']['object']['key']
-                        
-                        return self.process_s3_document(bucket, key)
+                s3_records = [record for record in event['Records'] if record.get('eventSource') == 'aws:s3']
+                if s3_records:
+                    return self.process_s3_records(s3_records)
             
             # Handle direct invocation
             return self.process_document_batch()
@@ -33,8 +95,43 @@ class DocumentProcessor:
             print(f"Document processing error: {str(e)}")
             return {
                 'statusCode': 500,
-                'body': json.dumps({'error': str(e)})
+                'body': orjson.dumps({'error': str(e)}).decode()
             }
+            
+        finally:
+            self.flush_pending_index()
+    
+    def process_s3_records(self, records: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Process every document in an S3 event concurrently"""
+        with ThreadPoolExecutor(max_workers=min(RECORD_WORKERS, len(records))) as executor:
+            results = list(executor.map(
+                lambda record: self.process_s3_document(record['s3']['bucket']['name'], record['s3']['object']['key']),
+                records
+            ))
+        
+        if len(results) == 1:
+            return results[0]
+        
+        failed = sum(result.get('statusCode', 500) != 200 for result in results)
+        
+        # 200 when every document succeeded, 500 when none did, 207 for a partial failure
+        if not failed:
+            status_code = 200
+        elif failed == len(results):
+            status_code = 500
+        else:
+            status_code = 207
+        
+        return {
+            'statusCode': status_code,
+            'body': orjson.dumps({
+                'message': f"Processed {len(results) - failed} of {len(results)} documents",
+                'results': [
+                    {'key': record['s3']['object']['key'], 'statusCode': result.get('statusCode', 500)}
+                    for record, result in zip(records, results)
+                ]
+            }).decode()
+        }
     
     def process_s3_document(self, bucket: str, key: str) -> Dict[str, Any]:
         """Process a single document from S3"""
@@ -53,12 +150,12 @@ class DocumentProcessor:
                 return self.process_text_document(key, document_content)
                 
         except Exception as e:
-            return {'statusCode': 500, 'body': json.dumps({'error': str(e)})}
+            return {'statusCode': 500, 'body': orjson.dumps({'error': str(e)}).decode()}
     
     def process_json_document(self, key: str, content: bytes) -> Dict[str, Any]:
         """Process JSON document (metadata, structured data)"""
         try:
-            data = json.loads(content.decode('utf-8'))
+            data = orjson.loads(content)
             
             # Extract key information
             doc_type = self.determine_document_type(data)
@@ -75,93 +172,79 @@ class DocumentProcessor:
                 return self.process_generic_document(data)
                 
         except Exception as e:
-            return {'statusCode': 500, 'body': json.dumps({'error': str(e)})}
+            return {'statusCode': 500, 'body': orjson.dumps({'error': str(e)}).decode()}
     
     def process_clinical_trial_document(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """Process clinical trial document with AI analysis"""
         try:
             # AI analysis of clinical trial
-            analysis_prompt = f"""
-            Analyze this clinical trial data for competitive intelligence:
-            
-            Title: {data.get('title', '')}
-            Phase: {data.get('phase', '')}
-            Status: {data.get('status', '')}
-            Sponsor: {data.get('sponsor', '')}
-            Condition: {data.get('condition', '')}
-            
-            Provide:
-            1. Competitive threat level (1-10)
-            2. Key brands impacted
-            3. Strategic implications
-            4. Risk assessment
-            """
+            analysis_prompt = TRIAL_ANALYSIS_INSTRUCTIONS + f"""
+Title: {data.get('title', '')}
+Phase: {data.get('phase', '')}
+Status: {data.get('status', '')}
+Sponsor: {data.get('sponsor', '')}
+Condition: {data.get('condition', '')}
+"""
             
             ai_analysis = self.get_ai_analysis(analysis_prompt)
+            insights = self.parse_analysis(ai_analysis)
             
             # Enrich document with AI insights
             enriched_data = {
                 **data,
                 'aiAnalysis': ai_analysis,
-                'competitiveThreatLevel': self.extract_threat_level(ai_analysis),
-                'brandsImpacted': self.extract_brands_from_analysis(ai_analysis),
-                'processedAt': datetime.now().isoformat(),
+                'competitiveThreatLevel': insights['threatLevel'],
+                'brandsImpacted': insights['brands'],
+                'processedAt': self._current_time().isoformat(),
                 'documentType': 'clinical_trial'
             }
             
             # Store in OpenSearch
-            doc_id = data.get('id', f"trial-{datetime.now().timestamp()}")
-            self.opensearch.index_document('trials', doc_id, enriched_data)
+            doc_id = data.get('id', f"trial-{self._current_time().timestamp()}-{uuid.uuid4().hex[:8]}")
+            self.queue_index('trials', doc_id, enriched_data)
             
             # Check for alerts
             self.check_competitive_alerts(enriched_data)
             
             return {
                 'statusCode': 200,
-                'body': json.dumps({
+                'body': orjson.dumps({
                     'message': 'Clinical trial processed successfully',
                     'documentId': doc_id,
                     'threatLevel': enriched_data.get('competitiveThreatLevel', 0)
-                })
+                }).decode()
             }
             
         except Exception as e:
-            return {'statusCode': 500, 'body': json.dumps({'error': str(e)})}
+            return {'statusCode': 500, 'body': orjson.dumps({'error': str(e)}).decode()}
     
     def process_regulatory_document(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """Process regulatory document (FDA approvals, safety alerts)"""
         try:
             # AI analysis for regulatory impact
-            analysis_prompt = f"""
-            Analyze this regulatory document for pharmaceutical competitive intelligence:
-            
-            Title: {data.get('title', '')}
-            Source: {data.get('source', '')}
-            Type: {data.get('type', '')}
-            Content: {data.get('content', '')[:1000]}
-            
-            Determine:
-            1. Regulatory impact score (1-10)
-            2. Affected pharmaceutical brands
-            3. Market implications
-            4. Urgency level for competitive response
-            """
+            analysis_prompt = REGULATORY_ANALYSIS_INSTRUCTIONS + f"""
+Title: {data.get('title', '')}
+Source: {data.get('source', '')}
+Type: {data.get('type', '')}
+Content: {data.get('content', '')[:1000]}
+"""
             
             ai_analysis = self.get_ai_analysis(analysis_prompt)
+            insights = self.parse_analysis(ai_analysis)
             
             enriched_data = {
                 **data,
                 'aiAnalysis': ai_analysis,
-                'regulatoryImpact': self.extract_impact_score(ai_analysis),
-                'brandsAffected': self.extract_brands_from_analysis(ai_analysis),
-                'urgencyLevel': self.extract_urgency_level(ai_analysis),
-                'processedAt': datetime.now().isoformat(),
+                'regulatoryImpact': insights['impactScore'],
+                'brandsAffected': insights['brands'],
+                'urgencyLevel': insights['urgency'],
+                'processedAt': self._current_time().isoformat(),
                 'documentType': 'regulatory'
             }
             
             # Store in OpenSearch
-            doc_id = data.get('id', f"reg-{datetime.now().timestamp()}")
-            self.opensearch.index_document('regulatory', doc_id, enriched_data)
+            doc_id = data.get('id', f"reg-{self._current_time().timestamp()}-{uuid.uuid4().hex[:8]}")
+            self.queue_index('regulatory', doc_id, enriched_data)
             
             # Generate alert if high impact
             if enriched_data.get('regulatoryImpact', 0) >= 7:
@@ -169,22 +252,22 @@ class DocumentProcessor:
             
             return {
                 'statusCode': 200,
-                'body': json.dumps({
+                'body': orjson.dumps({
                     'message': 'Regulatory document processed',
                     'documentId': doc_id,
                     'impact': enriched_data.get('regulatoryImpact', 0)
-                })
+                }).decode()
             }
             
         except Exception as e:
-            return {'statusCode': 500, 'body': json.dumps({'error': str(e)})}
+            return {'statusCode': 500, 'body': orjson.dumps({'error': str(e)}).decode()}
     
     def get_ai_analysis(self, prompt: str) -> str:
         """Get AI analysis using Bedrock"""
         try:
             response = self.bedrock.invoke_model(
                 modelId='anthropic.claude-3-sonnet-20240229-v1:0',
-                body=json.dumps({
+                body=orjson.dumps({
                     'anthropic_version': 'bedrock-2023-05-31',
                     'max_tokens': 500,
                     'messages': [
@@ -196,53 +279,47 @@ class DocumentProcessor:
                 })
             )
             
-            response_body = json.loads(response['body'].read())
+            response_body = orjson.loads(response['body'].read())
             return response_body['content'][0]['text']
             
         except Exception as e:
             print(f"AI analysis error: {str(e)}")
             return "AI analysis unavailable"
     
-    def extract_threat_level(self, analysis: str) -> int:
-        """Extract competitive threat level from AI analysis"""
-        try:
-            # Simple extraction - in production, use more sophisticated NLP
-            if 'threat level' in analysis.lower():
-                # Look for numbers 1-10
-                import re
-                matches = re.findall(r'threat level[:\s]*(\d+)', analysis.lower())
-                if matches:
-                    return min(int(matches[0]), 10)
-            
-            # Default scoring based on keywords
-            high_threat_keywords = ['critical', 'major', 'significant', 'breakthrough']
-            medium_threat_keywords = ['moderate', 'notable', 'important']
-            
-            analysis_lower = analysis.lower()
-            
-            if any(keyword in analysis_lower for keyword in high_threat_keywords):
-                return 8
-            elif any(keyword in analysis_lower for keyword in medium_threat_keywords):
-                return 5
-            else:
-                return 3
-                
-        except Exception:
-            return 3
-    
-    def extract_brands_from_analysis(self, analysis: str) -> list:
-        """Extract mentioned brands from AI analysis"""
-        brands = [
-            'keytruda', 'pembrolizumab',
-            'opdivo', 'nivolumab', 
-            'tecentriq', 'atezolizumab',
-            'imfinzi', 'durvalumab'
-        ]
-        
+    def parse_analysis(self, analysis: str) -> Dict[str, Any]:
+        """Extract threat level, impact score, brands and urgency from AI analysis in one pass"""
+        # Simple extraction - in production, use more sophisticated NLP
         analysis_lower = analysis.lower()
-        mentioned_brands = [brand for brand in brands if brand in analysis_lower]
         
-        return mentioned_brands
+        # Look for numbers 1-10, defaulting to keyword-based scoring
+        threat_match = _THREAT_LEVEL_PATTERN.search(analysis_lower)
+        if threat_match:
+            threat_level = min(int(threat_match.group(1)), 10)
+        elif _HIGH_THREAT_PATTERN.search(analysis_lower):
+            threat_level = 8
+        elif _MEDIUM_THREAT_PATTERN.search(analysis_lower):
+            threat_level = 5
+        else:
+            threat_level = 3
+        
+        impact_match = _IMPACT_SCORE_PATTERN.search(analysis_lower)
+        impact_score = min(int(impact_match.group(1)), 10) if impact_match else 5  # Default medium impact
+        
+        found = {match.group(0) for match in _BRAND_PATTERN.finditer(analysis_lower)}
+        
+        if _HIGH_URGENCY_PATTERN.search(analysis_lower):
+            urgency = 'high'
+        elif _MEDIUM_URGENCY_PATTERN.search(analysis_lower):
+            urgency = 'medium'
+        else:
+            urgency = 'low'
+        
+        return {
+            'threatLevel': threat_level,
+            'impactScore': impact_score,
+            'brands': [brand for brand in TARGET_BRANDS if brand in found],
+            'urgency': urgency
+        }
     
     def check_competitive_alerts(self, document_data: Dict[str, Any]) -> None:
         """Check if document should trigger competitive alerts"""
@@ -252,14 +329,14 @@ class DocumentProcessor:
             
             if threat_level >= 7 and brands_impacted:
                 alert_data = {
-                    'id': f"comp-alert-{datetime.now().timestamp()}",
+                    'id': f"comp-alert-{self._current_time().timestamp()}-{uuid.uuid4().hex[:8]}",
                     'title': f"High Competitive Threat Detected: {document_data.get('title', '')}",
                     'severity': 'high' if threat_level >= 8 else 'medium',
                     'source': 'Trials',
                     'brandImpacted': brands_impacted,
                     'description': f"Clinical trial with threat level {threat_level} detected",
                     'whyItMatters': document_data.get('aiAnalysis', '')[:200] + '...',
-                    'createdAt': datetime.now().isoformat(),
+                    'createdAt': self._current_time().isoformat(),
                     'confidenceScore': 90
                 }
                 
@@ -272,56 +349,61 @@ class DocumentProcessor:
         """Generate and store alert"""
         try:
             # Store in OpenSearch
-            self.opensearch.index_document('alerts', alert_data['id'], alert_data)
+            self.queue_index('alerts', alert_data['id'], alert_data)
             
             # Send SNS notification for high/critical alerts
             if alert_data.get('severity') in ['high', 'critical']:
                 self.sns.publish(
                     TopicArn=self.alert_topic,
-                    Message=json.dumps(alert_data),
+                    Message=orjson.dumps(alert_data).decode(),
                     Subject=f"{alert_data['severity'].title()} Alert: {alert_data['title']}"
                 )
                 
         except Exception as e:
             print(f"Error generating alert: {str(e)}")
     
+    def _current_time(self) -> datetime:
+        """Invocation time, or the current time when called outside lambda_handler"""
+        return self._now or datetime.now()
+    
+    def queue_index(self, index: str, doc_id: str, document: Dict[str, Any]) -> None:
+        """Buffer a document for the end-of-invocation bulk request"""
+        self._pending_index.append({
+            '_op_type': 'index',
+            '_index': index,
+            '_id': doc_id,
+            '_source': document
+        })
+    
+    def flush_pending_index(self) -> None:
+        """Bulk-index the documents and alerts buffered during this invocation"""
+        pending, self._pending_index = self._pending_index, []
+        self.opensearch.bulk(pending)
+    
     def determine_document_type(self, data: Dict[str, Any]) -> str:
         """Determine document type from data structure"""
         if 'nct_id' in data or 'phase' in data:
             return 'clinical_trial'
-        elif 'fda' in str(data).lower() or 'regulatory' in str(data).lower():
+        
+        # Top-level keys and descriptive fields classify nearly every document; only fall
+        # back to a bounded slice of the content instead of the repr of the whole document
+        descriptors = ' '.join([*map(str, data), *(str(data.get(field, '')) for field in ('source', 'type', 'title'))])
+        markers = {match.group(0).lower() for match in _DOC_TYPE_PATTERN.finditer(descriptors)}
+        if not markers:
+            content = str(data.get('content', ''))[:500]
+            markers = {match.group(0).lower() for match in _DOC_TYPE_PATTERN.finditer(content)}
+        
+        if 'fda' in markers or 'regulatory' in markers:
             return 'regulatory'
-        elif 'patent' in str(data).lower():
+        elif 'patent' in markers:
             return 'patent'
-        elif 'news' in str(data).lower() or 'article' in str(data).lower():
+        elif 'news' in markers or 'article' in markers:
             return 'news'
         else:
             return 'generic'
-    
-    def extract_impact_score(self, analysis: str) -> int:
-        """Extract regulatory impact score from analysis"""
-        # Similar to threat level extraction
-        try:
-            import re
-            matches = re.findall(r'impact score[:\s]*(\d+)', analysis.lower())
-            if matches:
-                return min(int(matches[0]), 10)
-            return 5  # Default medium impact
-        except Exception:
-            return 5
-    
-    def extract_urgency_level(self, analysis: str) -> str:
-        """Extract urgency level from analysis"""
-        analysis_lower = analysis.lower()
-        
-        if any(word in analysis_lower for word in ['urgent', 'immediate', 'critical']):
-            return 'high'
-        elif any(word in analysis_lower for word in ['moderate', 'medium']):
-            return 'medium'
-        else:
-            return 'low'
 
 # Lambda entry point
 def lambda_handler(event, context):
-    processor = DocumentProcessor()
-    return processor.lambda_handler(event, context)
\ No newline at end of file
+    global _PROCESSOR
+    _PROCESSOR = _PROCESSOR or DocumentProcessor()
+    return _PROCESSOR.lambda_handler(event, context)
\ No newline at end of file
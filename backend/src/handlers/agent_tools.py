@@ -1,13 +1,46 @@
-import json
+import orjson
 import boto3
-from typing import Dict, Any
+from typing import Dict, Any, List
 from services.opensearch_service import OpenSearchService
 from services.s3_service import S3Service
+from services.ttl_cache import TTLCache
+
+# Fields returned for each hit, with the default used when a document lacks one
+BRAND_RESULT_FIELDS = {
+    'id': None, 'name': None, 'molecule': None, 'manufacturer': None,
+    'indications': (), 'competitors': (), 'riskScore': 0
+}
+TRIAL_RESULT_FIELDS = {
+    'id': None, 'title': None, 'phase': None, 'status': None,
+    'condition': None, 'sponsor': None, 'participantCount': 0
+}
+ALERT_RESULT_FIELDS = {
+    'id': None, 'title': None, 'severity': None, 'source': None,
+    'brandImpacted': (), 'createdAt': None, 'confidenceScore': 0
+}
+THREAT_RESULT_FIELDS = {'title': None, 'severity': None, 'source': None, 'confidenceScore': 0}
+
+# Agents ask about the same brands repeatedly within a session; alerts are time-sensitive and not cached
+_LOOKUP_CACHE = TTLCache(maxsize=512, ttl=60)
+
+# Reused across warm invocations so clients and HTTP pools are built once per container
+_TOOLS = None
 
 class AgentTools:
     def __init__(self):
         self.opensearch = OpenSearchService()
         self.s3 = S3Service()
+        
+        # (action group, action) -> handler taking the request parameters
+        self.routes = {
+            ('DataRetrieval', 'brands/search'): lambda params: self._search_brands(params.get('query', '')),
+            ('DataRetrieval', 'trials/search'): lambda params: self._search_trials(params.get('query', '')),
+            ('DataRetrieval', 'competitive-landscape'): lambda params: self._get_competitive_landscape(params.get('brand', '')),
+            ('DataRetrieval', 'alerts'): self._get_alerts,
+            ('Analysis', 'analyze/competitive-position'): self._analyze_competitive_position,
+            ('Analysis', 'analyze/market-opportunity'): self._analyze_market_opportunity,
+            ('Analysis', 'analyze/threat-assessment'): self._analyze_threat_assessment
+        }
     
     def lambda_handler(self, event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         """Handle agent tool invocations"""
@@ -18,56 +51,39 @@ class AgentTools:
             parameters = event.get('parameters', [])
             
             # Convert parameters list to dict
-            params_dict = {}
-            for param in parameters:
-                params_dict[param.get('name')] = param.get('value')
+            params_dict = {param.get('name'): param.get('value') for param in parameters}
             
             # Route to appropriate handler
-            if action_group == 'DataRetrieval':
-                return self._handle_data_retrieval(action, params_dict)
+            handler = self.routes.get((action_group, action))
+            if handler:
+                return handler(params_dict)
+            elif action_group == 'DataRetrieval':
+                return self._error_response(f'Unknown data retrieval action: {action}')
             elif action_group == 'Analysis':
-                return self._handle_analysis(action, params_dict)
+                return self._error_response(f'Unknown analysis action: {action}')
             else:
                 return self._error_response(f'Unknown action group: {action_group}')
                 
         except Exception as e:
             return self._error_response(f'Agent tool error: {str(e)}')
     
-    def _handle_data_retrieval(self, action: str, params: Dict[str, str]) -> Dict[str, Any]:
-        """Handle data retrieval actions"""
-        try:
-            if action == 'brands/search':
-                return self._search_brands(params.get('query', ''))
-            elif action == 'trials/search':
-                return self._search_trials(params.get('query', ''))
-            elif action == 'competitive-landscape':
-                return self._get_competitive_landscape(params.get('brand', ''))
-            elif action == 'alerts':
-                return self._get_alerts(params)
-            else:
-                return self._error_response(f'Unknown data retrieval action: {action}')
-                
-        except Exception as e:
-            return self._error_response(f'Data retrieval failed: {str(e)}')
-    
-    def _handle_analysis(self, action: str, params: Dict[str, str]) -> Dict[str, Any]:
-        """Handle analysis actions"""
-        try:
-            if action == 'analyze/competitive-position':
-                return self._analyze_competitive_position(params)
-            elif action == 'analyze/market-opportunity':
-                return self._analyze_market_opportunity(params)
-            elif action == 'analyze/threat-assessment':
-                return self._analyze_threat_assessment(params)
-            else:
-                return self._error_response(f'Unknown analysis action: {action}')
-                
-        except Exception as e:
-            return self._error_response(f'Analysis failed: {str(e)}')
-    
     def _search_brands(self, query: str) -> Dict[str, Any]:
         """Search for brands"""
+        cache_key = ('brands/search', query)
+        cached = _LOOKUP_CACHE.get(cache_key)
+        if cached is not None:
+            return cached
+        
         try:
+            # An exact name match is cheap; only fall back to fuzzy matching when there is none
+            exact_query = {
+                'query': {
+                    'term': {'name.keyword': query}
+                },
+                '_source': list(BRAND_RESULT_FIELDS),
+                'size': 10,
+                'track_total_hits': False
+            }
             search_query = {
                 'query': {
                     'multi_match': {
@@ -76,37 +92,41 @@ class AgentTools:
                         'fuzziness': 'AUTO'
                     }
                 },
+                '_source': list(BRAND_RESULT_FIELDS),
                 'size': 10
             }
             
-            results = self.opensearch.search('brands', search_query)
-            
-            brands = []
-            for hit in results.get('hits', {}).get('hits', []):
-                brand = hit['_source']
-                brands.append({
-                    'id': brand.get('id'),
-                    'name': brand.get('name'),
-                    'molecule': brand.get('molecule'),
-                    'manufacturer': brand.get('manufacturer'),
-                    'indications': brand.get('indications', []),
-                    'competitors': brand.get('competitors', []),
-                    'riskScore': brand.get('riskScore', 0)
-                })
+            results = self._search_with_fallback('brands', exact_query, search_query)
             
-            return self._success_response({
+            brands = self._project_hits(results, BRAND_RESULT_FIELDS)
+            
+            response = self._success_response({
                 'action': 'brands/search',
                 'query': query,
                 'results': brands,
                 'count': len(brands)
             })
             
+            # Only cache hits so a transient OpenSearch failure is not remembered
+            if brands:
+                _LOOKUP_CACHE.set(cache_key, response)
+            return response
+            
         except Exception as e:
             return self._error_response(f'Brand search failed: {str(e)}')
     
     def _search_trials(self, query: str) -> Dict[str, Any]:
         """Search for clinical trials"""
         try:
+            # An exact title match is cheap; only fall back to fuzzy matching when there is none
+            exact_query = {
+                'query': {
+                    'term': {'title.keyword': query}
+                },
+                '_source': list(TRIAL_RESULT_FIELDS),
+                'size': 10,
+                'track_total_hits': False
+            }
             search_query = {
                 'query': {
                     'multi_match': {
@@ -115,23 +135,13 @@ class AgentTools:
                         'fuzziness': 'AUTO'
                     }
                 },
+                '_source': list(TRIAL_RESULT_FIELDS),
                 'size': 10
             }
             
-            results = self.opensearch.search('trials', search_query)
-            
-            trials = []
-            for hit in results.get('hits', {}).get('hits', []):
-                trial = hit['_source']
-                trials.append({
-                    'id': trial.get('id'),
-                    'title': trial.get('title'),
-                    'phase': trial.get('phase'),
-                    'status': trial.get('status'),
-                    'condition': trial.get('condition'),
-                    'sponsor': trial.get('sponsor'),
-                    'participantCount': trial.get('participantCount', 0)
-                })
+            results = self._search_with_fallback('trials', exact_query, search_query)
+            
+            trials = self._project_hits(results, TRIAL_RESULT_FIELDS)
             
             return self._success_response({
                 'action': 'trials/search',
@@ -143,14 +153,36 @@ class AgentTools:
         except Exception as e:
             return self._error_response(f'Trial search failed: {str(e)}')
     
+    @staticmethod
+    def _project_hits(results: Dict[str, Any], fields: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Pick `fields` out of each hit's _source, filling in their defaults"""
+        return [
+            {field: hit['_source'].get(field, default) for field, default in fields.items()}
+            for hit in results.get('hits', {}).get('hits', [])
+        ]
+    
+    def _search_with_fallback(self, index: str, query: Dict[str, Any], fallback_query: Dict[str, Any]) -> Dict[str, Any]:
+        """Run `query`, and `fallback_query` only if the first returns no hits"""
+        results = self.opensearch.search(index, query)
+        if results.get('hits', {}).get('hits'):
+            return results
+        return self.opensearch.search(index, fallback_query)
+    
     def _get_competitive_landscape(self, brand: str) -> Dict[str, Any]:
         """Get competitive landscape for a brand"""
+        cache_key = ('competitive-landscape', brand)
+        cached = _LOOKUP_CACHE.get(cache_key)
+        if cached is not None:
+            return cached
+        
         try:
-            # Get brand details
+            # Get brand details; only the top hit's competitors are read
             brand_query = {
                 'query': {
                     'match': {'name': brand}
-                }
+                },
+                '_source': ['competitors'],
+                'size': 1
             }
             
             brand_results = self.opensearch.search('brands', brand_query)
@@ -162,8 +194,9 @@ class AgentTools:
             brand_data = brand_hits[0]['_source']
             competitors = brand_data.get('competitors', [])
             
-            # Get competitive data
+            # Get competitive data; only the aggregation buckets are read
             landscape_query = {
+                'size': 0,
                 'query': {
                     'terms': {
                         'brand.keyword': [brand] + competitors
@@ -195,12 +228,17 @@ class AgentTools:
                     'docCount': bucket['doc_count']
                 })
             
-            return self._success_response({
+            response = self._success_response({
                 'action': 'competitive-landscape',
                 'brand': brand,
                 'landscape': landscape
             })
             
+            # Only cache buckets so a transient OpenSearch failure is not remembered
+            if landscape:
+                _LOOKUP_CACHE.set(cache_key, response)
+            return response
+            
         except Exception as e:
             return self._error_response(f'Landscape retrieval failed: {str(e)}')
     
@@ -224,30 +262,21 @@ class AgentTools:
                     'query': {
                         'bool': {'filter': filters}
                     },
+                    '_source': list(ALERT_RESULT_FIELDS),
                     'sort': [{'createdAt': {'order': 'desc'}}],
                     'size': 20
                 }
             else:
                 query = {
                     'query': {'match_all': {}},
+                    '_source': list(ALERT_RESULT_FIELDS),
                     'sort': [{'createdAt': {'order': 'desc'}}],
                     'size': 20
                 }
             
             results = self.opensearch.search('alerts', query)
             
-            alerts = []
-            for hit in results.get('hits', {}).get('hits', []):
-                alert = hit['_source']
-                alerts.append({
-                    'id': alert.get('id'),
-                    'title': alert.get('title'),
-                    'severity': alert.get('severity'),
-                    'source': alert.get('source'),
-                    'brandImpacted': alert.get('brandImpacted', []),
-                    'createdAt': alert.get('createdAt'),
-                    'confidenceScore': alert.get('confidenceScore', 0)
-                })
+            alerts = self._project_hits(results, ALERT_RESULT_FIELDS)
             
             return self._success_response({
                 'action': 'alerts',
@@ -271,32 +300,39 @@ class AgentTools:
             
             # Get brand data
             brand_query = {
-                'query': {'match': {'name': brand}}
+                'query': {'match': {'name': brand}},
+                '_source': ['competitors', 'riskScore', 'indications'],
+                'size': 1
             }
-            brand_results = self.opensearch.search('brands', brand_query)
-            brand_data = brand_results.get('hits', {}).get('hits', [{}])[0].get('_source', {})
             
-            # Get recent trials
+            # Count recent trials; only the total is used
             trials_query = {
                 'query': {
                     'range': {
                         'date': {'gte': f'now-{timeframe}'}
                     }
                 },
-                'size': 50
+                'size': 0,
+                'track_total_hits': True
             }
-            trials_results = self.opensearch.search('trials', trials_query)
             
-            # Get recent alerts
+            # Count recent alerts; only the total is used
             alerts_query = {
                 'query': {
                     'range': {
                         'createdAt': {'gte': f'now-{timeframe}'}
                     }
                 },
-                'size': 20
+                'size': 0,
+                'track_total_hits': True
             }
-            alerts_results = self.opensearch.search('alerts', alerts_query)
+            
+            brand_results, trials_results, alerts_results = self.opensearch.msearch([
+                ('brands', brand_query),
+                ('trials', trials_query),
+                ('alerts', alerts_query)
+            ])
+            brand_data = brand_results.get('hits', {}).get('hits', [{}])[0].get('_source', {})
             
             analysis = {
                 'brand': brand,
@@ -330,6 +366,7 @@ class AgentTools:
                 'query': {
                     'match': {'condition': indication}
                 },
+                '_source': ['phase'],
                 'size': 100
             }
             trials_results = self.opensearch.search('trials', trials_query)
@@ -367,30 +404,28 @@ class AgentTools:
             
             # Get brand data
             brand_query = {
-                'query': {'match': {'name': brand}}
+                'query': {'match': {'name': brand}},
+                '_source': ['competitors', 'riskScore'],
+                'size': 1
             }
-            brand_results = self.opensearch.search('brands', brand_query)
-            brand_data = brand_results.get('hits', {}).get('hits', [{}])[0].get('_source', {})
             
             # Get recent alerts for this brand
             alerts_query = {
                 'query': {
                     'term': {'brandImpacted.keyword': brand}
                 },
+                '_source': list(THREAT_RESULT_FIELDS),
                 'sort': [{'createdAt': {'order': 'desc'}}],
                 'size': 20
             }
-            alerts_results = self.opensearch.search('alerts', alerts_query)
-            
-            threats = []
-            for hit in alerts_results.get('hits', {}).get('hits', []):
-                alert = hit['_source']
-                threats.append({
-                    'title': alert.get('title'),
-                    'severity': alert.get('severity'),
-                    'source': alert.get('source'),
-                    'confidenceScore': alert.get('confidenceScore', 0)
-                })
+            
+            brand_results, alerts_results = self.opensearch.msearch([
+                ('brands', brand_query),
+                ('alerts', alerts_query)
+            ])
+            brand_data = brand_results.get('hits', {}).get('hits', [{}])[0].get('_source', {})
+            
+            threats = self._project_hits(alerts_results, THREAT_RESULT_FIELDS)
             
             assessment = {
                 'brand': brand,
@@ -412,17 +447,18 @@ class AgentTools:
     def _success_response(self, data: Dict[str, Any]) -> Dict[str, Any]:
         return {
             'statusCode': 200,
-            'body': json.dumps(data)
+            'body': orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS).decode()
         }
     
     def _error_response(self, message: str) -> Dict[str, Any]:
         return {
             'statusCode': 500,
-            'body': json.dumps({
+            'body': orjson.dumps({
                 'error': message
-            })
+            }).decode()
         }
 
 def lambda_handler(event, context):
-    tools = AgentTools()
-    return tools.lambda_handler(event, context)
+    global _TOOLS
+    _TOOLS = _TOOLS or AgentTools()
+    return _TOOLS.lambda_handler(event, context)
@@ -0,0 +1,9 @@
+import random
+from urllib3.util.retry import Retry
+
+class JitteredRetry(Retry):
+    """urllib3 Retry with full-jitter exponential backoff so concurrent clients don't retry in lockstep"""
+
+    def get_backoff_time(self) -> float:
+        backoff = super().get_backoff_time()
+        return random.uniform(0, backoff) if backoff > 0 else 0
@@ -1,10 +1,29 @@
 import os
 import boto3
-import json
-from typing import Dict, Any, Optional
-from opensearchpy import OpenSearch, RequestsHttpConnection
+import orjson
+from typing import Dict, Any, List, Optional, Tuple
+from opensearchpy import OpenSearch, RequestsHttpConnection, JSONSerializer, helpers
+from opensearchpy.exceptions import SerializationError
 from aws_requests_auth.aws_auth import AWSRequestsAuth
 
+class OrjsonSerializer(JSONSerializer):
+    """JSONSerializer backed by orjson for request and response bodies"""
+    
+    def dumps(self, data: Any) -> str:
+        # Pre-serialized bodies pass through untouched, as in JSONSerializer
+        if isinstance(data, str):
+            return data
+        try:
+            return orjson.dumps(data, default=self.default).decode()
+        except (ValueError, TypeError) as e:
+            raise SerializationError(data, e)
+    
+    def loads(self, s: Any) -> Any:
+        try:
+            return orjson.loads(s)
+        except (ValueError, TypeError) as e:
+            raise SerializationError(s, e)
+
 class OpenSearchService:
     def __init__(self):
         self.endpoint = os.environ.get('OPENSEARCH_ENDPOINT', '')
@@ -19,21 +38,64 @@ class OpenSearchService:
             http_auth=awsauth,
             use_ssl=True,
             verify_certs=True,
-            connection_class=RequestsHttpConnection
+            connection_class=RequestsHttpConnection,
+            pool_maxsize=25,
+            http_compress=True,
+            serializer=OrjsonSerializer()
         )
     
-    def search(self, index: str, query: Dict[str, Any]) -> Dict[str, Any]:
-        """Execute search query on OpenSearch index"""
+    def search(self, index: str, query: Dict[str, Any], filter_path: Optional[str] = None) -> Dict[str, Any]:
+        """Execute search query on OpenSearch index, optionally trimming the response to `filter_path`"""
         try:
             response = self.client.search(
                 index=index,
-                body=query
+                body=query,
+                filter_path=filter_path
             )
             return response
         except Exception as e:
             print(f"OpenSearch search error: {str(e)}")
             return {'hits': {'hits': [], 'total': {'value': 0}}}
     
+    def msearch(self, searches: List[Tuple[str, Dict[str, Any]]], filter_path: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Execute several (index, query) searches in a single _msearch round trip"""
+        if filter_path:
+            # Paths are relative to each search response; keeping `took` stops an empty
+            # response from being dropped and misaligning the results with `searches`
+            filter_path = ','.join(f'responses.{path}' for path in filter_path.split(',') + ['took', 'error'])
+        
+        body = []
+        for index, query in searches:
+            body.append({'index': index})
+            body.append(query)
+        
+        empty = {'hits': {'hits': [], 'total': {'value': 0}}}
+        try:
+            response = self.client.msearch(body=body, filter_path=filter_path)
+            return [
+                empty if 'error' in result else result
+                for result in response.get('responses', [])
+            ]
+        except Exception as e:
+            print(f"OpenSearch msearch error: {str(e)}")
+            return [empty for _ in searches]
+    
+    def mget(self, index: str, ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Fetch documents by ID in one round trip; returns the _source of each one found"""
+        if not ids:
+            return {}
+        
+        try:
+            response = self.client.mget(index=index, body={'ids': ids})
+            return {
+                doc['_id']: doc.get('_source', {})
+                for doc in response.get('docs', [])
+                if doc.get('found')
+            }
+        except Exception as e:
+            print(f"OpenSearch mget error: {str(e)}")
+            return {}
+    
     def count_documents(self, index: str, filters: Optional[Dict[str, Any]] = None) -> int:
         """Count documents in index with optional filters"""
         try:
@@ -69,13 +131,24 @@ class OpenSearchService:
             # Return mock data for development
             return self._get_mock_count(index, filters)
     
-    def index_document(self, index: str, doc_id: str, document: Dict[str, Any]) -> bool:
-        """Index a document in OpenSearch"""
+    def has_field(self, index: str, field: str) -> Optional[bool]:
+        """Whether the index mapping defines `field`; None if the mapping could not be read"""
+        try:
+            response = self.client.indices.get_field_mapping(index=index, fields=field)
+            return any(field in mapping.get('mappings', {}) for mapping in response.values())
+        except Exception as e:
+            print(f"OpenSearch field mapping error: {str(e)}")
+            return None
+    
+    def index_document(self, index: str, doc_id: str, document: Dict[str, Any], routing: Optional[str] = None) -> bool:
+        """Index a document in OpenSearch, optionally with custom shard routing"""
         try:
             response = self.client.index(
                 index=index,
                 id=doc_id,
-                body=document
+                body=document,
+                routing=routing,
+                filter_path='_id,result'
             )
             return response.get('result') in ['created', 'updated']
         except Exception as e:
@@ -84,29 +157,47 @@ class OpenSearchService:
     
     def bulk_index(self, index: str, documents: list) -> bool:
         """Bulk index multiple documents"""
+        return self.bulk([
+            {
+                '_op_type': 'index',
+                '_index': index,
+                '_id': doc.get('id'),
+                '_source': doc
+            }
+            for doc in documents
+        ])
+    
+    def bulk(self, actions: List[Dict[str, Any]]) -> bool:
+        """Execute bulk actions, chunked and retried on 429 rejections"""
+        if not actions:
+            return True
+        
         try:
-            actions = []
-            for doc in documents:
-                actions.append({
-                    '_index': index,
-                    '_id': doc.get('id'),
-                    '_source': doc
-                })
-            
-            response = self.client.bulk(body=actions)
-            return not response.get('errors', False)
+            _, errors = helpers.bulk(
+                self.client,
+                actions,
+                chunk_size=500,
+                max_chunk_bytes=100 * 1024 * 1024,
+                max_retries=3,
+                raise_on_error=False,
+                # Only per-item status and errors are read back
+                filter_path='errors,items.*.status,items.*.error'
+            )
+            if errors:
+                print(f"OpenSearch bulk errors: {len(errors)} failed actions")
+            return not errors
         except Exception as e:
             print(f"OpenSearch bulk index error: {str(e)}")
             return False
     
-    def create_index(self, index: str, mapping: Dict[str, Any]) -> bool:
-        """Create index with mapping"""
+    def create_index(self, index: str, mapping: Dict[str, Any], settings: Optional[Dict[str, Any]] = None) -> bool:
+        """Create index with mapping and optional index settings"""
         try:
             if not self.client.indices.exists(index=index):
-                response = self.client.indices.create(
-                    index=index,
-                    body={'mappings': mapping}
-                )
+                body = {'mappings': mapping}
+                if settings:
+                    body['settings'] = settings
+                response = self.client.indices.create(index=index, body=body)
                 return response.get('acknowledged', False)
             return True
         except Exception as e:
@@ -0,0 +1,35 @@
+import threading
+import time
+
+class RateLimiter:
+    """Thread-safe token bucket allowing `rate` requests per `period` seconds to one host"""
+
+    def __init__(self, rate: float, period: float = 1.0):
+        self.capacity = rate
+        self.fill_rate = rate / period
+        self._tokens = float(rate)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        """Block until a token is available, then consume it"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.fill_rate)
+                self._updated = now
+
+                if now >= self._paused_until and self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+
+                delay = max(self._paused_until - now, (1 - self._tokens) / self.fill_rate)
+
+            time.sleep(delay)
+
+    def pause(self, seconds: float) -> None:
+        """Hold all callers back, e.g. for a server's Retry-After"""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._tokens = 0.0
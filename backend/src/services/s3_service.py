@@ -1,29 +1,71 @@
 import os
-import json
+import gzip
+import orjson
 import boto3
-from typing import Dict, Any, Optional
+from botocore.config import Config
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
 
+UPLOAD_WORKERS = 32
+
 class S3Service:
     def __init__(self):
-        self.s3_client = boto3.client('s3')
+        # Keep-alive pool sized for concurrent batch uploads
+        self.s3_client = boto3.client(
+            's3', config=Config(max_pool_connections=UPLOAD_WORKERS, tcp_keepalive=True)
+        )
         self.metadata_bucket = os.environ.get('METADATA_BUCKET', '')
         self.datalake_bucket = os.environ.get('DATALAKE_BUCKET', '')
     
-    def store_metadata(self, key: str, metadata: Dict[str, Any]) -> bool:
-        """Store metadata in S3"""
+    def store_metadata(self, key: str, metadata: Dict[str, Any], compress: bool = False) -> bool:
+        """Store metadata in S3, optionally gzip-encoded"""
         try:
+            body = orjson.dumps(metadata, default=str, option=orjson.OPT_NON_STR_KEYS)
+            extra_args = {}
+            if compress:
+                body = gzip.compress(body)
+                extra_args['ContentEncoding'] = 'gzip'
+            
             self.s3_client.put_object(
                 Bucket=self.metadata_bucket,
                 Key=key,
-                Body=json.dumps(metadata, default=str),
-                ContentType='application/json'
+                Body=body,
+                ContentType='application/json',
+                **extra_args
             )
             return True
         except Exception as e:
             print(f"S3 store metadata error: {str(e)}")
             return False
     
+    def store_metadata_batch(self, items: List[Tuple[str, Dict[str, Any]]], compress: bool = False) -> int:
+        """Store many metadata objects concurrently; returns the number stored"""
+        if not items:
+            return 0
+        
+        with ThreadPoolExecutor(max_workers=min(UPLOAD_WORKERS, len(items))) as executor:
+            results = executor.map(lambda item: self.store_metadata(*item, compress=compress), items)
+            return sum(results)
+    
+    def store_jsonl(self, key: str, records: List[Dict[str, Any]]) -> bool:
+        """Store records as a single gzipped JSON Lines object in the metadata bucket"""
+        try:
+            body = gzip.compress(b'\n'.join(
+                orjson.dumps(record, default=str, option=orjson.OPT_NON_STR_KEYS) for record in records
+            ))
+            self.s3_client.put_object(
+                Bucket=self.metadata_bucket,
+                Key=key,
+                Body=body,
+                ContentType='application/x-ndjson',
+                ContentEncoding='gzip'
+            )
+            return True
+        except Exception as e:
+            print(f"S3 store JSONL error: {str(e)}")
+            return False
+    
     def get_metadata(self, key: str) -> Optional[Dict[str, Any]]:
         """Retrieve metadata from S3"""
         try:
@@ -31,7 +73,7 @@ class S3Service:
                 Bucket=self.metadata_bucket,
                 Key=key
             )
-            return json.loads(response['Body'].read())
+            return orjson.loads(response['Body'].read())
         except Exception as e:
             print(f"S3 get metadata error: {str(e)}")
             return None
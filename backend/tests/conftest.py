@@ -0,0 +1,7 @@
+import os
+import sys
+
+# Lambda puts backend/src on the import path; mirror that for the tests
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
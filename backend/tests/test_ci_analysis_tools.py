@@ -0,0 +1,45 @@
+import unittest
+from unittest import mock
+
+import ci_analysis_tools
+from ci_analysis_tools import CIAnalysisTools
+
+
+class TrialsTextMatchTest(unittest.TestCase):
+    def setUp(self):
+        patch = mock.patch.object(ci_analysis_tools, 'OpenSearchService')
+        patch.start()
+        self.addCleanup(patch.stop)
+        ci_analysis_tools._COMBINED_TEXT_CACHE.clear()
+        self.addCleanup(ci_analysis_tools._COMBINED_TEXT_CACHE.clear)
+        
+        self.tools = CIAnalysisTools()
+        self.tools.opensearch.search.return_value = {'hits': {'hits': [], 'total': {'value': 0}}}
+
+    def trials_match(self) -> dict:
+        self.tools.assess_clinical_trials({'brand_name': 'Keytruda'})
+        index, query = self.tools.opensearch.search.call_args.args
+        self.assertEqual(index, 'trials')
+        return query['query']['bool']['must'][0]
+
+    def test_uses_combined_text_when_mapped(self):
+        self.tools.opensearch.has_field.return_value = True
+        
+        self.assertEqual(self.trials_match(), {'match': {'combined_text': 'Keytruda'}})
+
+    def test_falls_back_to_multi_match_on_dynamic_mapping(self):
+        self.tools.opensearch.has_field.return_value = False
+        
+        self.assertEqual(self.trials_match(), {
+            'multi_match': {'query': 'Keytruda', 'fields': ci_analysis_tools._TRIALS_MATCH_FIELDS}
+        })
+
+    def test_unreadable_mapping_is_not_cached(self):
+        self.tools.opensearch.has_field.return_value = None
+        
+        self.assertIn('multi_match', self.trials_match())
+        self.assertIsNone(ci_analysis_tools._COMBINED_TEXT_CACHE.get('trials'))
+
+
+if __name__ == '__main__':
+    unittest.main()
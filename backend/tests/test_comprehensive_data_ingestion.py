@@ -0,0 +1,114 @@
+import unittest
+from unittest import mock
+
+import comprehensive_data_ingestion
+from comprehensive_data_ingestion import ComprehensiveDataIngestionPipeline
+
+PAPER = {
+    'pmid': '12345',
+    'title': 'Keytruda versus Opdivo in first-line melanoma',
+    'abstract': 'A head-to-head comparison.',
+    'authors': ['A. Author'],
+    'journal': 'J Oncol',
+    'published_date': '2024-01-01'
+}
+
+HIGH_IMPACT = {
+    'impact_score': 9,
+    'key_findings': 'Superior overall survival',
+    'brands_affected': ['keytruda', 'opdivo'],
+    'confidence': 85
+}
+
+
+def make_pipeline(test: unittest.TestCase) -> ComprehensiveDataIngestionPipeline:
+    """Build a pipeline with AWS clients replaced by mocks for the duration of the test"""
+    patches = [
+        mock.patch.object(comprehensive_data_ingestion, 'OpenSearchService'),
+        mock.patch.object(comprehensive_data_ingestion, 'S3Service'),
+        mock.patch.object(comprehensive_data_ingestion.boto3, 'client'),
+        mock.patch.dict('os.environ', {'ALERT_TOPIC': 'arn:aws:sns:us-east-1:123456789012:alerts'})
+    ]
+    for patch in patches:
+        patch.start()
+        test.addCleanup(patch.stop)
+    
+    return ComprehensiveDataIngestionPipeline()
+
+
+def make_response(status_code: int, headers: dict = None) -> mock.Mock:
+    return mock.Mock(status_code=status_code, headers=headers or {}, content=b'{}')
+
+
+class ProcessResearchPaperTest(unittest.TestCase):
+    def setUp(self):
+        self.pipeline = make_pipeline(self)
+        self.pipeline.analyze_paper_competitive_impact = mock.Mock(return_value=HIGH_IMPACT)
+
+    def test_high_impact_paper_is_returned_and_alerted(self):
+        doc = self.pipeline.process_research_paper_enhanced(PAPER, '2024-01-02T00:00:00')
+        
+        self.assertEqual(doc['id'], '12345')
+        self.assertEqual(doc['competitiveInsights']['impact_score'], 9)
+        self.assertEqual(sorted(doc['brandsmentioned']), ['keytruda', 'opdivo'])
+        
+        self.pipeline.opensearch.index_document.assert_called_once()
+        index, alert_id, alert = self.pipeline.opensearch.index_document.call_args.args
+        self.assertEqual((index, alert_id), ('alerts', 'research-alert-12345'))
+        self.assertEqual(alert['severity'], 'high')
+        self.pipeline.sns.publish.assert_called_once()
+
+    def test_high_impact_paper_survives_alert_failure(self):
+        self.pipeline.opensearch.index_document.side_effect = RuntimeError('OpenSearch unavailable')
+        
+        doc = self.pipeline.process_research_paper_enhanced(PAPER, '2024-01-02T00:00:00')
+        
+        self.assertIsNotNone(doc)
+        self.assertEqual(doc['id'], '12345')
+
+    def test_low_impact_paper_does_not_alert(self):
+        self.pipeline.analyze_paper_competitive_impact.return_value = {'impact_score': 5, 'confidence': 50}
+        
+        doc = self.pipeline.process_research_paper_enhanced(PAPER)
+        
+        self.assertEqual(doc['id'], '12345')
+        self.pipeline.opensearch.index_document.assert_not_called()
+
+
+
+class RateLimitedGetTest(unittest.TestCase):
+    def setUp(self):
+        self.pipeline = make_pipeline(self)
+        self.pipeline.session = mock.Mock()
+        self.limiter = mock.Mock()
+
+    def test_session_adapter_leaves_429_to_get(self):
+        pipeline = make_pipeline(self)
+        retry = pipeline.session.get_adapter('https://example.org').max_retries
+        
+        self.assertNotIn(429, retry.status_forcelist)
+
+    def test_429_pauses_limiter_and_retries(self):
+        self.pipeline.session.get.side_effect = [
+            make_response(429, {'Retry-After': '2'}),
+            make_response(200)
+        ]
+        
+        response = self.pipeline._get('https://api.fda.gov/drug/event.json', {}, self.limiter)
+        
+        self.assertEqual(response.status_code, 200)
+        self.limiter.pause.assert_called_once_with(2.0)
+        self.assertEqual(self.limiter.wait.call_count, 2)
+
+    def test_persistent_429_gives_up(self):
+        self.pipeline.session.get.return_value = make_response(429)
+        
+        result = self.pipeline._get_json('https://api.fda.gov/drug/event.json', {}, self.limiter)
+        
+        self.assertIsNone(result)
+        self.assertEqual(self.pipeline.session.get.call_count, comprehensive_data_ingestion.RATE_LIMIT_ATTEMPTS)
+        self.limiter.pause.assert_called_with(1.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+import unittest
+from unittest import mock
+
+import orjson
+
+import data_quality_pipeline
+from data_quality_pipeline import DataQualityPipeline
+
+
+def make_pipeline(test: unittest.TestCase) -> DataQualityPipeline:
+    """Build a pipeline with AWS clients replaced by mocks for the duration of the test"""
+    patches = [
+        mock.patch.object(data_quality_pipeline, 'OpenSearchService'),
+        mock.patch.object(data_quality_pipeline, 'S3Service'),
+        mock.patch.object(data_quality_pipeline.boto3, 'client')
+    ]
+    for patch in patches:
+        patch.start()
+        test.addCleanup(patch.stop)
+    
+    return DataQualityPipeline()
+
+
+def uniqueness_response(total: int, keyed: int, unique: int) -> dict:
+    return {
+        'hits': {'total': {'value': total}},
+        'aggregations': {'keyed': {'value': keyed}, 'unique': {'value': unique}}
+    }
+
+
+class LambdaHandlerTest(unittest.TestCase):
+    def setUp(self):
+        self.pipeline = make_pipeline(self)
+
+    def test_consistency_check_is_rejected_explicitly(self):
+        response = self.pipeline.lambda_handler({'check_type': 'consistency'}, None)
+        
+        self.assertEqual(response['statusCode'], 400)
+        body = orjson.loads(response['body'])
+        self.assertIn('consistency', body['error'])
+        self.assertNotIn('consistency', body['supported_check_types'])
+        self.assertIn('uniqueness', body['supported_check_types'])
+
+    def test_known_check_type_is_dispatched(self):
+        self.pipeline.check_handlers['uniqueness'] = mock.Mock(return_value={'statusCode': 200})
+        
+        response = self.pipeline.lambda_handler({'check_type': 'uniqueness'}, None)
+        
+        self.assertEqual(response, {'statusCode': 200})
+
+
+class CompletenessSearchesTest(unittest.TestCase):
+    def test_empty_strings_count_as_missing(self):
+        searches = dict(data_quality_pipeline._COMPLETENESS_SEARCHES)
+        abstract = searches['papers']['aggs']['fields']['filters']['filters']['abstract']
+        
+        self.assertEqual(abstract['bool']['filter'], [{'exists': {'field': 'abstract'}}])
+        self.assertEqual(abstract['bool']['must_not'], [{'term': {'abstract.keyword': ''}}])
+        
+        complete = searches['papers']['aggs']['complete']['filter']['bool']['filter']
+        self.assertEqual(len(complete), len(data_quality_pipeline.REQUIRED_FIELDS['papers']))
+
+
+class CheckDataUniquenessTest(unittest.TestCase):
+    def setUp(self):
+        self.pipeline = make_pipeline(self)
+
+    def report(self) -> dict:
+        self.pipeline.check_data_uniqueness()
+        return self.pipeline._pending_index[-1]['_source']['details']
+
+    def test_documents_without_a_key_are_not_duplicates(self):
+        self.pipeline.opensearch.msearch.return_value = [
+            uniqueness_response(total=100, keyed=60, unique=60),
+            uniqueness_response(total=50, keyed=50, unique=48),
+            uniqueness_response(total=0, keyed=0, unique=0)
+        ]
+        
+        details = self.report()
+        
+        self.assertEqual(details['papers']['duplicate_documents'], 0)
+        self.assertEqual(details['papers']['missing_key_documents'], 40)
+        self.assertEqual(details['papers']['uniqueness_score'], 1)
+        self.assertEqual(details['trials']['duplicate_documents'], 2)
+        self.assertEqual(self.pipeline.opensearch.msearch.call_count, 1)
+
+    def test_large_indices_count_duplicates_exactly(self):
+        keyed = data_quality_pipeline.CARDINALITY_PRECISION + 1000
+        self.pipeline.opensearch.msearch.side_effect = [
+            [
+                uniqueness_response(total=keyed, keyed=keyed, unique=keyed - 900),
+                uniqueness_response(total=10, keyed=10, unique=10),
+                uniqueness_response(total=10, keyed=10, unique=10)
+            ],
+            [{'aggregations': {'duplicates': {'buckets': [{'doc_count': 3}, {'doc_count': 2}]}}}]
+        ]
+        
+        details = self.report()
+        
+        self.assertEqual(details['papers']['duplicate_documents'], 3)
+        duplicate_searches = self.pipeline.opensearch.msearch.call_args_list[1].args[0]
+        self.assertEqual([index for index, _ in duplicate_searches], ['papers'])
+
+
+if __name__ == '__main__':
+    unittest.main()
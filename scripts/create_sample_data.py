@@ -12,6 +12,39 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend', 'src'))
 
 from services.opensearch_service import OpenSearchService
 
+def _combined_text_field():
+    """Text field copied into combined_text, keeping the default keyword sub-field"""
+    return {
+        'type': 'text',
+        'copy_to': 'combined_text',
+        'fields': {'keyword': {'type': 'keyword', 'ignore_above': 256}}
+    }
+
+# Searchable fields folded into one combined_text field so queries score a single field;
+# brand names keep a keyword sub-field for exact-name lookups
+INDEX_FIELD_MAPPINGS = {
+    'brands': {
+        'name': {'type': 'text', 'fields': {'keyword': {'type': 'keyword', 'ignore_above': 256}}}
+    },
+    'trials': {
+        'title': _combined_text_field(),
+        'sponsor': _combined_text_field(),
+        'brand': _combined_text_field(),
+        'combined_text': {'type': 'text'}
+    },
+    'patents': {
+        'title': _combined_text_field(),
+        'assignee': _combined_text_field(),
+        'claims': _combined_text_field(),
+        'combined_text': {'type': 'text'}
+    }
+}
+
+# Large, rarely-read documents trade some CPU for a smaller on-disk index
+INDEX_SETTINGS = {
+    'regulatory': {'index': {'codec': 'best_compression'}}
+}
+
 def create_sample_brands():
     """Create sample brand data"""
     return [
@@ -206,6 +239,8 @@ def main():
         ('brands', create_sample_brands()),
         ('alerts', create_sample_alerts()),
         ('trials', create_sample_trials()),
+        ('patents', []),
+        ('regulatory', []),
         ('competitive_landscape', create_sample_competitive_landscape())
     ]
     
@@ -223,8 +258,9 @@ def main():
                 'lastUpdated': {'type': 'date'}
             }
         }
+        mapping['properties'].update(INDEX_FIELD_MAPPINGS.get(index_name, {}))
         
-        opensearch.create_index(index_name, mapping)
+        opensearch.create_index(index_name, mapping, INDEX_SETTINGS.get(index_name))
         
         # Index sample documents
         for doc in data: